@@ -2,6 +2,7 @@ from nicegui import ui
 
 from backend.admin.common import render_navigation
 from backend.babble.models import BabbleSentence
+from backend.core.loaders import Loaders
 from backend.courses.models import UserProgress
 from backend.settings import settings
 
@@ -23,7 +24,9 @@ def save_action_gen(sentence_id, editables):
 def del_action_gen(sentence_id):
     async def del_action(e):
         nonlocal sentence_id
-        await BabbleSentence.find_one(BabbleSentence.id == sentence_id).delete()
+        sentence = await BabbleSentence.get(sentence_id)
+        if sentence:
+            await sentence.delete()
         ui.navigate.reload()
 
     return del_action
@@ -36,8 +39,7 @@ async def babble_page():
     # TODO: get last sentences from analytical log, get last/most complained about sentences
     user = await UserProgress.get("ff2caa0f-2426-4ad4-b9fe-b1e01f0f0e2a")
     last_sent_ids = user.languages["es"].last_exercises
-    data = await BabbleSentence.find({"_id": {"$in": last_sent_ids}}).to_list()
-    by_id = {sentence.id: sentence for sentence in data}
+    by_id = await Loaders().sentences.load_many(last_sent_ids)
     langs = list(settings.LANGUAGES.keys())
 
     for i, id in enumerate(last_sent_ids[::-1]):
@@ -1,7 +1,13 @@
-from nicegui import ui
+from urllib.parse import urlencode
+
+from nicegui import app, ui
 
 from backend.admin.common import render_navigation
 from backend.dictionary.models import DICTIONARIES
+from backend.dictionary.search import SearchPage, get_search_index
+
+WORDS_PAGE_SIZE = 100
+AUTOCOMPLETE_SIZE = 10
 
 
 def save_action_gen(lang, to_lang, word_id, editable):
@@ -15,32 +21,41 @@ def save_action_gen(lang, to_lang, word_id, editable):
     return save_action
 
 
+@app.get("/api/words/{lang}/search")
+async def search_words(lang: str, q: str = "", limit: int = AUTOCOMPLETE_SIZE, cursor: str | None = None) -> SearchPage:
+    # Prefix, accent-insensitive search over words and their translations, for autocomplete
+    index = await get_search_index(lang)
+    return index.search(q, min(limit, WORDS_PAGE_SIZE), cursor)
+
+
 @ui.page("/words/{lang}")
-async def words_page(lang: str, search: str = ""):
+async def words_page(lang: str, search: str = "", cursor: str | None = None):
     def go_action(e):
-        return ui.navigate.to(f"/words/{lang}?search={search_input.value}")
+        return ui.navigate.to(f"/words/{lang}?{urlencode({'search': search_input.value})}")
+
+    async def autocomplete_action(e):
+        index = await get_search_index(lang)
+        search_input.set_autocomplete(index.search(e.value, AUTOCOMPLETE_SIZE).ids if e.value else [])
 
     render_navigation(f"Words {lang.upper()}")
     words_model = DICTIONARIES[lang]
 
     with ui.row():
-        search_input = ui.input(label="Search", value=search, autocomplete=await words_model.get_all_words()).on(
+        search_input = ui.input(label="Search", value=search, on_change=autocomplete_action).on(
             "keydown.enter", go_action
         )
         ui.button(icon="search", on_click=go_action)
         ui.button(icon="close", on_click=lambda e: ui.navigate.to(f"/words/{lang}"))
 
-    if not search:
-        query = words_model.find_all()
-    else:
-        query = words_model.find({"$or": [{"_id": search}, {"normalized": search}]})
+    page = (await get_search_index(lang)).search(search, WORDS_PAGE_SIZE, cursor)
+    by_id = {word.id: word for word in await words_model.find({"_id": {"$in": page.ids}}).to_list()}
 
     with ui.grid(columns=1 + (len(DICTIONARIES) - 1)):
         ui.label(lang.upper())
         for to_lang in DICTIONARIES:
             if to_lang != lang:
                 ui.label(to_lang.upper())
-        for word in await query.limit(100).to_list():
+        for word in [by_id[id] for id in page.ids if id in by_id]:
             word_id = word.id
             ui.label(word.id).classes("font-bold")
             for to_lang in DICTIONARIES:
@@ -52,3 +67,6 @@ async def words_page(lang: str, search: str = ""):
                         editable.on("keydown.enter.ctrl", save_action)
                         editable.on("keydown.enter.meta", save_action)
                         editable.on("keydown.enter.alt", save_action)
+
+    if page.cursor:
+        ui.link("Next", f"/words/{lang}?{urlencode({'search': search, 'cursor': page.cursor})}")
@@ -1,8 +1,10 @@
 from litestar import Litestar, get
 
 from backend.app_ctx import get_application_ctx
+from backend.babble.gpt import gpt_handlers
 from backend.core.api_auth import auth_handlers, jwt_auth
-from backend.courses.handlers import user_handlers
+from backend.courses.handlers import loaders_dependency, user_handlers
+from backend.courses.worker import worker_handlers
 
 
 @get("/")
@@ -11,8 +13,9 @@ async def hello() -> str:
 
 
 app = Litestar(
-    [hello, *auth_handlers, *user_handlers],
+    [hello, *auth_handlers, *user_handlers, *worker_handlers, *gpt_handlers],
     lifespan=[get_application_ctx],
+    dependencies=loaders_dependency,
     on_app_init=[jwt_auth.on_app_init],
     debug=True,
 )
@@ -1,30 +1,48 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from beanie import init_beanie
 from litestar import Litestar
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from backend.babble.babble import streaming_tasks
+from backend.babble.gpt import GPT_CLIENT, GPTClient
+from backend.babble.index import SENTENCE_INDEX
 from backend.babble.models import babble_models
+from backend.core.crypto import shutdown_executor
 from backend.core.models import core_models
 from backend.courses.models import courses_models
+from backend.courses.worker import SENTENCE_WORKER
 from backend.dictionary.models import words_models
+from backend.dictionary.snapshot import DICTIONARY_SNAPSHOTS
 from backend.settings import settings
 
+document_models = [*babble_models, *core_models, *courses_models, *words_models]
+
 
 class AppCtx:
     mongo_client: AsyncIOMotorClient
+    gpt_client: GPTClient = GPT_CLIENT
 
     @classmethod
     async def start(cls) -> None:
         cls.mongo_client = AsyncIOMotorClient(settings.MONGO_URL)
-        await init_beanie(
-            database=cls.mongo_client[settings.MONGO_DB],
-            document_models=[*babble_models, *core_models, *courses_models, *words_models],
-        )
+        await init_beanie(database=cls.mongo_client[settings.MONGO_DB], document_models=document_models)
+        if settings.USE_SENTENCE_INDEX:
+            await SENTENCE_INDEX.load()
+        if settings.USE_DICTIONARY_SNAPSHOT:
+            await DICTIONARY_SNAPSHOTS.load()
+            DICTIONARY_SNAPSHOTS.start(settings.DICTIONARY_REFRESH_INTERVAL)
+        if settings.SENTENCE_WORKER:
+            SENTENCE_WORKER.start()
 
     @classmethod
     async def shutdown(cls) -> None:
-        pass
+        await SENTENCE_WORKER.stop()
+        await DICTIONARY_SNAPSHOTS.stop()
+        await asyncio.gather(*streaming_tasks, return_exceptions=True)  # let streamed sentences be stored
+        await cls.gpt_client.close()
+        shutdown_executor()
 
 
 @asynccontextmanager
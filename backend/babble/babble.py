@@ -1,34 +1,46 @@
+import asyncio
 import json
 import re
 import time
-from typing import Optional, Type
+from collections import Counter
+from typing import AsyncIterator, Optional, Type
 
-import openai
 from loguru import logger
 
+from backend.babble.gpt import GPT_CLIENT, GPTClient
+from backend.babble.index import SENTENCE_INDEX
 from backend.babble.models import BabbleSentence
+from backend.babble.offline import OfflineSentences
+from backend.babble.streaming import ArrayObjectsParser
 from backend.settings import settings
 
 json_pattern = re.compile(r"```(?:json)?(.*?)```", re.DOTALL)
 
+MAX_SENTENCES_PER_GENERATION = 40
+
+streaming_tasks: set[asyncio.Task] = set()
+
+# Number of DB lookup passes each call needed, {function: {passes: calls}}
+pass_counts: dict[str, Counter] = {"get_sentences": Counter(), "get_sentences_for_words": Counter()}
+
 
 class GPTSentences:
-    token: str
+    client: GPTClient
     model: str
     lang_codes: dict[str, str]
 
-    def __init__(self):
-        self.token = settings.GPT_TOKEN
+    def __init__(self, client: GPTClient | None = None):
+        self.client = client or GPT_CLIENT
         self.model = settings.GPT_MODEL
         self.lang_codes = settings.LANGUAGES
 
-    async def generate_senteces(
+    def build_request(
         self,
         dictionary: list[str],
         req_dictionary: Optional[list[str]] = None,
         base_language: str = "es",
         N: int = 40,
-    ) -> list[dict[str, str]]:
+    ) -> dict:
         prompt = (
             f"Here is a list of words in {self.lang_codes[base_language]}: {', '.join(dictionary)}. "
             f"Generate {N} different sentences with these words and only with these words "
@@ -38,8 +50,8 @@ class GPTSentences:
             if len(req_dictionary) == 1:
                 prompt += f", but each sentence absolutely must contain the word '{req_dictionary[0]}' "
             else:
-                prompt += ", but each sentence absolutely must contain at least one word from this list: "
-                prompt += ", ".join(req_dictionary)
+                prompt += ", but each sentence absolutely must contain exactly one word from this list "
+                prompt += f"(and no other word from it): {', '.join(req_dictionary)}"
         prompt += ". Return as a JSON list, with these fields for each: "
         prompt += ", ".join(f"{code} - sentence in {language}" for code, language in self.lang_codes.items())
 
@@ -59,13 +71,7 @@ class GPTSentences:
             },
         }
 
-        logger.info(
-            f"Calling OpenAI API model {self.model} to generate {N} sentences in {len(self.lang_codes)} languages..."
-        )
-
-        start = time.perf_counter()
-        client = openai.AsyncOpenAI(api_key=settings.GPT_TOKEN)
-        completion = await client.chat.completions.create(
+        return dict(
             model=self.model,
             messages=[
                 {"role": "system", "content": "You are a language tutor"},
@@ -75,6 +81,24 @@ class GPTSentences:
                 {"name": "fn_sentences", "parameters": schema},
             ],
         )
+
+    def is_valid(self, sentence) -> bool:
+        return isinstance(sentence, dict) and set(sentence.keys()) == set(self.lang_codes.keys())
+
+    async def generate_senteces(
+        self,
+        dictionary: list[str],
+        req_dictionary: Optional[list[str]] = None,
+        base_language: str = "es",
+        N: int = 40,
+    ) -> list[dict[str, str]]:
+        request = self.build_request(dictionary, req_dictionary, base_language, N)
+        logger.info(
+            f"Calling OpenAI API model {self.model} to generate {N} sentences in {len(self.lang_codes)} languages..."
+        )
+
+        start = time.perf_counter()
+        completion = await self.client.chat_completion(**request)
         usage = completion.usage
         response_message = completion.choices[0].message
 
@@ -110,11 +134,7 @@ class GPTSentences:
             hacks.append("not_list")
             result = []
 
-        result = [
-            sentence
-            for sentence in result
-            if isinstance(sentence, dict) and set(sentence.keys()) == set(self.lang_codes.keys())
-        ]
+        result = [sentence for sentence in result if self.is_valid(sentence)]
 
         logger.info(
             f"OpenAPI {self.model} call took {time.perf_counter() - start:.6}s, returning {len(result)} sentences. "
@@ -124,15 +144,60 @@ class GPTSentences:
 
         return result
 
+    async def stream_senteces(
+        self,
+        dictionary: list[str],
+        req_dictionary: Optional[list[str]] = None,
+        base_language: str = "es",
+        N: int = 40,
+    ) -> AsyncIterator[dict[str, str]]:
+        # Same as generate_senteces, but yields each sentence as soon as its JSON object is complete
+        request = self.build_request(dictionary, req_dictionary, base_language, N)
+        logger.info(f"Streaming {N} sentences in {len(self.lang_codes)} languages from OpenAI API model {self.model}")
+
+        start = time.perf_counter()
+        parser = ArrayObjectsParser()
+        count = 0
+        async for chunk in self.client.chat_completion_stream(**request):
+            for choice in chunk.choices:
+                delta = choice.delta
+                if delta.tool_calls:
+                    content = delta.tool_calls[0].function.arguments
+                elif delta.function_call:
+                    content = delta.function_call.arguments
+                else:
+                    content = delta.content
+                for sentence in parser.feed(content or ""):
+                    if self.is_valid(sentence):
+                        count += 1
+                        if count == 1:
+                            logger.info(f"First sentence streamed in {time.perf_counter() - start:.6}s")
+                        yield sentence
+
+        logger.info(
+            f"OpenAPI {self.model} stream took {time.perf_counter() - start:.6}s, returned {count} sentences, "
+            f"{parser.errors} unparsable"
+        )
+
+
+SENTENCE_SOURCES: dict[str, Type] = {
+    "gpt": GPTSentences,
+    "offline": OfflineSentences,
+}
+
+
+def get_source_class() -> Type:
+    return SENTENCE_SOURCES[settings.SENTENCE_SOURCE]
+
 
 async def generate_babble(
     dictionary: list[str],
     req_dictionary: list[str] | None = None,
     base_language: str = "es",
     N: int = 40,
-    source_class: Type = GPTSentences,
+    source_class: Type | None = None,
 ) -> list[BabbleSentence]:
-    source = source_class()
+    source = (source_class or get_source_class())()
     sentences = await source.generate_senteces(
         dictionary=dictionary,
         req_dictionary=req_dictionary,
@@ -141,16 +206,29 @@ async def generate_babble(
     )
 
     start = time.perf_counter()
-    result = [
-        BabbleSentence(
-            text={lang: sentence for lang, sentence in sentence.items()},
-        )
-        for sentence in sentences
-    ]
+    result = BabbleSentence.from_texts(sentences)
     logger.info(f"Tokenized {len(sentences)} sentences in {time.perf_counter() - start:.6}s")
     return result
 
 
+async def stream_babble(
+    dictionary: list[str],
+    req_dictionary: list[str] | None = None,
+    base_language: str = "es",
+    N: int = 40,
+    source_class: Type | None = None,
+) -> AsyncIterator[BabbleSentence]:
+    # generate_babble, yielding each sentence lemmatized as soon as the source returns it
+    source = (source_class or get_source_class())()
+    async for sentence in source.stream_senteces(
+        dictionary=dictionary,
+        req_dictionary=req_dictionary,
+        N=N,
+        base_language=base_language,
+    ):
+        yield BabbleSentence.from_texts([sentence])[0]
+
+
 async def get_from_db(
     dictionary: list[str],
     req_dictionary: list[str] | None = None,
@@ -158,6 +236,13 @@ async def get_from_db(
     N: int = 10,
     exclude_ids: list[str] | None = None,
 ) -> list[BabbleSentence]:
+    if SENTENCE_INDEX.loaded:
+        await SENTENCE_INDEX.refresh(settings.SENTENCE_INDEX_REFRESH_INTERVAL)
+        ids = SENTENCE_INDEX[base_language].find(dictionary, req_dictionary, exclude_ids)
+        if not ids:
+            return []
+        return await BabbleSentence.find({"_id": {"$in": ids}}).to_list()
+
     subqueries = [{"$expr": {"$setIsSubset": [f"$lemmas.{base_language}", dictionary + (req_dictionary or [])]}}]
     if exclude_ids:
         subqueries.append({"_id": {"$nin": exclude_ids}})
@@ -179,6 +264,34 @@ async def generate_and_save_sentences(
         base_language=base_language,
         N=N,
     )
+    log_generated(sentences, dictionary, req_dictionary, base_language)
+    inserted = await BabbleSentence.insert_new(sentences)
+    if len(inserted) < len(sentences):
+        logger.info(f"Skipped {len(sentences) - len(inserted)} duplicates from results")
+    return inserted
+
+
+async def stream_and_save_sentences(
+    dictionary: list[str],
+    req_dictionary: Optional[list[str]] = None,
+    base_language: str = "es",
+    N: int = 10,
+) -> AsyncIterator[BabbleSentence]:
+    # generate_and_save_sentences, storing and yielding sentences one by one as they are streamed
+    async for sentence in stream_babble(
+        dictionary=dictionary,
+        req_dictionary=req_dictionary,
+        base_language=base_language,
+        N=N,
+    ):
+        log_generated([sentence], dictionary, req_dictionary, base_language)
+        if await BabbleSentence.insert_new([sentence]):
+            yield sentence
+
+
+def log_generated(
+    sentences: list[BabbleSentence], dictionary: list[str], req_dictionary: list[str] | None, base_language: str
+):
     for s in sentences:
         logger.info(f"Generated sentece: {s.text}")
         if req_dictionary:
@@ -187,18 +300,38 @@ async def generate_and_save_sentences(
         extra = set(s.lemmas[base_language]) - set(dictionary) - set(req_dictionary or [])
         logger.info(f"Extra words: {extra}")
 
-    found_sentences_result = await BabbleSentence.find(
-        {f"text.{base_language}": {"$in": [sentence.text[base_language] for sentence in sentences]}}
-    ).to_list()
 
-    if found_sentences_result:
-        logger.info(f"Removing {len(found_sentences_result)} duplicates from results")
-        found_sentences = [sentence.text[base_language] for sentence in found_sentences_result]
-        sentences = [sentence for sentence in sentences if sentence.text[base_language] not in found_sentences]
+def start_streaming(
+    dictionary: list[str],
+    req_dictionary: list[str],
+    base_language: str,
+    N: int,
+) -> asyncio.Queue:
+    # Runs stream_and_save_sentences in a background task, so generation finishes and every sentence is stored
+    # even when the caller stops reading the queue early. None in the queue marks the end of the stream
+    queue = asyncio.Queue()
+
+    async def run():
+        try:
+            async for sentence in stream_and_save_sentences(dictionary, req_dictionary, base_language, N):
+                queue.put_nowait(sentence)
+        except Exception:
+            logger.exception("Streaming sentence generation failed")
+        finally:
+            queue.put_nowait(None)
+
+    task = asyncio.create_task(run())
+    streaming_tasks.add(task)
+    task.add_done_callback(streaming_tasks.discard)
+    return queue
+
 
-    if sentences:
-        await BabbleSentence.insert_many(sentences)
-    return sentences
+def is_matching(sentence: BabbleSentence, dictionary: list[str], req_dictionary: list[str], base_language: str) -> bool:
+    # Same condition as get_from_db
+    lemmas = set(sentence.lemmas.get(base_language, []))
+    if req_dictionary and not lemmas & set(req_dictionary):
+        return False
+    return lemmas <= set(dictionary) | set(req_dictionary)
 
 
 async def get_sentences(
@@ -230,21 +363,141 @@ async def get_sentences(
         if len(sentences) >= N:
             break
 
-        to_generate = 20
-        dict_len = len(dictionary) + len(req_dictionary)
-        if dict_len < 10:
-            to_generate = 10
-            # to_generate = 30
-            # if dict_len < 20:
-            #     to_generate = 20
-            # if dict_len < 10:
-            #     to_generate = 10
+        if settings.GPT_STREAM:
+            # Return as soon as enough new matching sentences are stored, the rest is saved in background
+            queue = start_streaming(
+                dictionary, req_dictionary, base_language, sentences_to_generate(dictionary, req_dictionary)
+            )
+            while len(sentences) < N and (sentence := await queue.get()) is not None:
+                if is_matching(sentence, dictionary, req_dictionary, base_language):
+                    sentences.append(sentence)
+            continue
 
         await generate_and_save_sentences(
             dictionary=dictionary,
             req_dictionary=req_dictionary,
             base_language=base_language,
-            N=to_generate,
+            N=sentences_to_generate(dictionary, req_dictionary),
         )
 
+    pass_counts["get_sentences"][pass_no] += 1
     return sentences[:N]
+
+
+def sentences_to_generate(dictionary: list[str], req_dictionary: list[str]) -> int:
+    to_generate = 20
+    dict_len = len(dictionary) + len(req_dictionary)
+    if dict_len < 10:
+        to_generate = 10
+        # to_generate = 30
+        # if dict_len < 20:
+        #     to_generate = 20
+        # if dict_len < 10:
+        #     to_generate = 10
+    return to_generate
+
+
+def assign_to_words(
+    sentences: list[BabbleSentence], dictionary: list[str], words: list[str], base_language: str
+) -> dict[str, list]:
+    # Each sentence goes to one of the words it is a sentence for: it contains the word and otherwise only words of
+    # the dictionary, as get_from_db with the word as the only required word. Sentences fitting several of them
+    # (words that are in the dictionary too, like practice words) go to the word that has the fewest sentences so
+    # far, after the sentences fitting one word
+    known = set(dictionary)
+    result = {word: [] for word in words}
+    fitting = []
+    for sentence in sentences:
+        lemmas = set(sentence.lemmas.get(base_language, []))
+        fitting.append((sentence, [word for word in words if word in lemmas and lemmas <= known | {word}]))
+    for sentence, sentence_words in sorted(fitting, key=lambda item: len(item[1])):
+        if sentence_words:
+            result[min(sentence_words, key=lambda word: len(result[word]))].append(sentence)
+    return result
+
+
+async def get_from_db_by_words(
+    dictionary: list[str],
+    words: list[str],
+    base_language: str = "es",
+    exclude_ids: list[str] | None = None,
+) -> dict[str, list[BabbleSentence]]:
+    # get_from_db with each of the words as the only required word, in one DB round-trip, sentences bucketed by
+    # required word. A sentence with two of the words not in the dictionary is not a sentence for either
+    if SENTENCE_INDEX.loaded:
+        await SENTENCE_INDEX.refresh(settings.SENTENCE_INDEX_REFRESH_INTERVAL)
+        index = SENTENCE_INDEX[base_language]
+        ids = list({id for word in words for id in index.find(dictionary, [word], exclude_ids)})
+        found = await BabbleSentence.find({"_id": {"$in": ids}}).to_list() if ids else []
+        return assign_to_words(found, dictionary, words, base_language)
+
+    lemmas = f"lemmas.{base_language}"
+    subqueries = [
+        {"$or": [{lemmas: word, "$expr": {"$setIsSubset": [f"${lemmas}", dictionary + [word]]}} for word in words]}
+    ]
+    if exclude_ids:
+        subqueries.append({"_id": {"$nin": exclude_ids}})
+    found = await BabbleSentence.find({"$and": subqueries}).to_list()
+    return assign_to_words(found, dictionary, words, base_language)
+
+
+async def get_sentences_for_words(
+    dictionary: list[str],
+    words: list[str],
+    base_language: str = "es",
+    N: int = 10,
+    exclude_ids: list[str] | None = None,
+    maximum_passes: int = 5,
+    distinct: bool = False,
+    concurrency: int | None = None,
+) -> dict[str, list[BabbleSentence]]:
+    # get_sentences for each of the words as required word: every pass is one DB lookup for all words, and words
+    # that don't have enough sentences yet share generation calls. With distinct, no sentence is used twice
+    semaphore = asyncio.Semaphore(concurrency or settings.SENTENCE_GENERATION_CONCURRENCY)
+
+    async def generate(req_dictionary: list[str], per_word: int):
+        async with semaphore:
+            await generate_and_save_sentences(
+                dictionary=dictionary,
+                req_dictionary=req_dictionary,
+                base_language=base_language,
+                N=per_word * len(req_dictionary),
+            )
+
+    result = {word: [] for word in words}
+    missing = list(words)
+    pass_no = 0
+
+    while missing and pass_no < maximum_passes:
+        pass_no += 1
+        found = await get_from_db_by_words(
+            dictionary=dictionary,
+            words=missing,
+            base_language=base_language,
+            exclude_ids=exclude_ids,
+        )
+        used = {sentence.id for word in words if word not in missing for sentence in result[word]}
+        for word in missing:
+            result[word] = []
+            for sentence in found[word]:
+                if len(result[word]) >= N:
+                    break
+                if not distinct or sentence.id not in used:
+                    result[word].append(sentence)
+                    if distinct:
+                        used.add(sentence.id)
+        missing = [word for word in missing if len(result[word]) < N]
+        logger.info(f"Pass {pass_no}: {len(words) - len(missing)}/{len(words)} words have enough sentences in DB")
+
+        if not missing:
+            break
+
+        # Short words share generation calls of up to MAX_SENTENCES_PER_GENERATION sentences, run concurrently
+        per_word = sentences_to_generate(dictionary, missing)
+        group_size = max(1, MAX_SENTENCES_PER_GENERATION // per_word)
+        await asyncio.gather(
+            *(generate(missing[i : i + group_size], per_word) for i in range(0, len(missing), group_size))
+        )
+
+    pass_counts["get_sentences_for_words"][pass_no] += 1
+    return result
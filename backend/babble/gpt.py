@@ -0,0 +1,129 @@
+import asyncio
+import time
+from typing import AsyncIterator
+
+import openai
+from litestar import get
+from loguru import logger
+from pydantic import BaseModel
+
+from backend.settings import settings
+
+
+class GPTStats(BaseModel):
+    calls: int = 0
+    in_flight: int = 0
+    retries: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+
+class GPTClient:
+    # Shared OpenAI client: one connection pool for all generations, a cap on concurrent calls
+    # and retries with exponential backoff on rate limits and server errors
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+        retry_delay: float | None = None,
+    ):
+        self.base_url = base_url or settings.GPT_BASE_URL
+        self.max_concurrency = max_concurrency or settings.GPT_MAX_CONCURRENCY
+        self.max_retries = settings.GPT_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_delay = settings.GPT_RETRY_DELAY if retry_delay is None else retry_delay
+        self.client: openai.AsyncOpenAI | None = None
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.stats = GPTStats()
+
+    def get_client(self) -> openai.AsyncOpenAI:
+        if self.client is None:
+            self.client = openai.AsyncOpenAI(
+                api_key=settings.GPT_TOKEN,
+                base_url=self.base_url,
+                timeout=settings.GPT_TIMEOUT,
+                max_retries=0,  # retried here, to count retries and to hold the concurrency slot while backing off
+            )
+        return self.client
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def chat_completion(self, **kwargs):
+        async with self.semaphore:
+            self.stats.in_flight += 1
+            try:
+                return await self._chat_completion(**kwargs)
+            finally:
+                self.stats.in_flight -= 1
+
+    async def chat_completion_stream(self, **kwargs) -> AsyncIterator:
+        # Streamed completion chunks; the concurrency slot is held until the stream is consumed
+        async with self.semaphore:
+            self.stats.in_flight += 1
+            start = time.perf_counter()
+            try:
+                stream = await self._chat_completion(stream=True, stream_options={"include_usage": True}, **kwargs)
+                async for chunk in stream:
+                    if chunk.usage:
+                        self.record_usage(chunk.usage)
+                    yield chunk
+            finally:
+                self.stats.in_flight -= 1
+            latency = time.perf_counter() - start
+            self.stats.total_latency += latency
+            self.stats.max_latency = max(self.stats.max_latency, latency)
+
+    async def _chat_completion(self, **kwargs):
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                completion = await self.get_client().chat.completions.create(**kwargs)
+            except (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError) as e:
+                if attempt >= self.max_retries:
+                    self.stats.errors += 1
+                    raise
+                delay = self.retry_delay * 2**attempt
+                attempt += 1
+                self.stats.retries += 1
+                logger.warning(f"OpenAI API call failed ({e.__class__.__name__}), retry {attempt} in {delay:.3}s")
+                await asyncio.sleep(delay)
+                continue
+            except openai.OpenAIError:
+                self.stats.errors += 1
+                raise
+
+            self.stats.calls += 1
+            if kwargs.get("stream"):
+                return completion
+            latency = time.perf_counter() - start
+            self.stats.total_latency += latency
+            self.stats.max_latency = max(self.stats.max_latency, latency)
+            if completion.usage:
+                self.record_usage(completion.usage)
+            return completion
+
+    def record_usage(self, usage):
+        self.stats.prompt_tokens += usage.prompt_tokens
+        self.stats.completion_tokens += usage.completion_tokens
+        self.stats.total_tokens += usage.total_tokens
+
+
+GPT_CLIENT = GPTClient()
+
+
+@get("/gpt/stats")
+async def get_gpt_stats() -> GPTStats:
+    return GPT_CLIENT.stats
+
+
+gpt_handlers = [get_gpt_stats]
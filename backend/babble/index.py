@@ -0,0 +1,150 @@
+import time
+from collections import defaultdict
+from typing import Iterable
+from uuid import UUID
+
+
+class LemmaIndex:
+    """Inverted index lemma -> sentence ids for one language."""
+
+    def __init__(self):
+        self.lemmas: dict[UUID, frozenset[str]] = {}
+        self.postings: dict[str, set[UUID]] = defaultdict(set)
+        self.empty: set[UUID] = set()
+
+    def __len__(self) -> int:
+        return len(self.lemmas)
+
+    def add(self, id: UUID, lemmas: Iterable[str]):
+        if id in self.lemmas:
+            self.remove(id)
+        lemmas = frozenset(lemmas)
+        self.lemmas[id] = lemmas
+        if not lemmas:
+            self.empty.add(id)
+        for lemma in lemmas:
+            self.postings[lemma].add(id)
+
+    def remove(self, id: UUID):
+        lemmas = self.lemmas.pop(id, None)
+        if lemmas is None:
+            return
+        self.empty.discard(id)
+        for lemma in lemmas:
+            ids = self.postings.get(lemma)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del self.postings[lemma]
+
+    def find(
+        self,
+        dictionary: Iterable[str],
+        req_dictionary: Iterable[str] | None = None,
+        exclude_ids: Iterable[UUID] | None = None,
+    ) -> list[UUID]:
+        # Sentences whose lemmas are a subset of dictionary + req_dictionary and contain at least one required word
+        allowed = set(dictionary)
+        required = set(req_dictionary or [])
+        allowed |= required
+        excluded = set(exclude_ids or [])
+
+        if required:
+            candidates = set()
+            for word in required:
+                candidates |= self.postings.get(word, set())
+            return [id for id in candidates if id not in excluded and self.lemmas[id] <= allowed]
+
+        # Without required words, count how many of each sentence's lemmas are allowed:
+        # the sentence matches when all of them are, so only postings of allowed words are visited
+        counts = defaultdict(int)
+        for word in allowed:
+            for id in self.postings.get(word, ()):
+                counts[id] += 1
+        found = [id for id, count in counts.items() if count == len(self.lemmas[id])]
+        found += self.empty
+        return [id for id in found if id not in excluded]
+
+
+class SentenceIndex:
+    """Per-language lemma indexes over all BabbleSentence documents, kept in memory.
+
+    Changes saved by this process are applied to the index directly. Other processes (admin app, CLI commands,
+    standalone sentence worker) bump SentencesVersion too, and refresh reads the sentences they changed again.
+    The index is reloaded whole only when it is too far behind for SentencesVersion to have all its changes.
+    """
+
+    def __init__(self):
+        self.languages: dict[str, LemmaIndex] = defaultdict(LemmaIndex)
+        self.loaded = False
+        self.version = 0  # SentencesVersion the index is up to date with
+        self.checked = 0.0  # time.monotonic() of the last version check
+        self.reloads = 0
+        self.updates = 0  # refreshes that applied changes of other processes
+
+    def __getitem__(self, lang: str) -> LemmaIndex:
+        return self.languages[lang]
+
+    def clear(self):
+        self.languages.clear()
+
+    def add(self, id: UUID, lemmas: dict[str, list[str]]):
+        for lang, lang_lemmas in lemmas.items():
+            self.languages[lang].add(id, lang_lemmas)
+
+    def remove(self, id: UUID):
+        for index in self.languages.values():
+            index.remove(id)
+
+    def saved(self, version: int):
+        # Called after sentences were changed (and added to or removed from the index) and the version bumped
+        if version == self.version + 1:
+            # Otherwise someone else changed sentences too (or an earlier save of this process isn't done yet),
+            # and the next refresh reads the changed sentences again
+            self.version = version
+
+    async def load(self):
+        from backend.babble.models import BabbleSentence, SentenceLemmasView, SentencesVersion
+
+        # The version is read first: a change made while loading makes the next refresh load again.
+        # The index is swapped when complete, so lookups keep using the old one meanwhile
+        version = await SentencesVersion.get_version()
+        languages = defaultdict(LemmaIndex)
+        async for sentence in BabbleSentence.find_all().project(SentenceLemmasView):
+            for lang, lemmas in sentence.lemmas.items():
+                languages[lang].add(sentence.id, lemmas)
+        self.languages = languages
+        self.version = version
+        self.checked = time.monotonic()
+        self.loaded = True
+        self.reloads += 1
+
+    async def refresh(self, interval: float = 0):
+        # Applies changes of sentences saved by other processes, checking at most every interval seconds
+        from backend.babble.models import SentencesVersion
+
+        if not self.loaded or time.monotonic() - self.checked < interval:
+            return
+        self.checked = time.monotonic()
+        version, changed = await SentencesVersion.get_changes(self.version)
+        if version == self.version:
+            return
+        if changed is None:
+            await self.load()
+            return
+        await self.update(changed)
+        self.version = version
+        self.updates += 1
+
+    async def update(self, ids: set[UUID]):
+        # Reads the sentences again, the ones not found were deleted
+        from backend.babble.models import BabbleSentence, SentenceLemmasView
+
+        found = await BabbleSentence.find({"_id": {"$in": list(ids)}}).project(SentenceLemmasView).to_list()
+        for id in ids:
+            self.remove(id)
+        for sentence in found:
+            self.add(sentence.id, sentence.lemmas)
+
+
+SENTENCE_INDEX = SentenceIndex()
@@ -0,0 +1,68 @@
+import json
+import sqlite3
+from collections import OrderedDict
+
+
+class LemmaCache:
+    """Bounded LRU cache of lemmatization results, optionally backed by sqlite file so it survives restarts."""
+
+    def __init__(self, maxsize: int, path: str | None = None):
+        self.maxsize = maxsize
+        self.data: OrderedDict[str, tuple[str, ...]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("PRAGMA synchronous=OFF")
+            self.db.execute("CREATE TABLE IF NOT EXISTS lemmas (key TEXT PRIMARY KEY, lemmas TEXT NOT NULL)")
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return json.dumps(parts, ensure_ascii=False)
+
+    def get(self, key: str) -> list[str] | None:
+        lemmas = self.data.get(key)
+        if lemmas is not None:
+            self.data.move_to_end(key)
+        elif self.db is not None:
+            row = self.db.execute("SELECT lemmas FROM lemmas WHERE key = ?", (key,)).fetchone()
+            if row:
+                lemmas = tuple(json.loads(row[0]))
+                self._remember(key, lemmas)
+
+        if lemmas is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(lemmas)
+
+    def set(self, key: str, lemmas: list[str]):
+        self.set_many([(key, lemmas)])
+
+    def set_many(self, items: list[tuple[str, list[str]]]):
+        for key, lemmas in items:
+            self._remember(key, tuple(lemmas))
+        if self.db is not None and items:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO lemmas (key, lemmas) VALUES (?, ?)",
+                [(key, json.dumps(lemmas, ensure_ascii=False)) for key, lemmas in items],
+            )
+            self.db.commit()
+
+    def _remember(self, key: str, lemmas: tuple[str, ...]):
+        self.data[key] = lemmas
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+        self.hits = 0
+        self.misses = 0
+        if self.db is not None:
+            self.db.execute("DELETE FROM lemmas")
+            self.db.commit()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self.data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
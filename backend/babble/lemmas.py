@@ -1,15 +1,32 @@
+import hashlib
+import json
 import time
+from functools import cache
+from importlib.metadata import PackageNotFoundError, version
 
-import spacy
 from loguru import logger
 
+from backend.babble.lemma_cache import LemmaCache
 from backend.settings import settings
 
-nlp = {}
-start = time.perf_counter()
-for code, model in settings.SPACY_MODELS.items():
-    nlp[code] = spacy.load(model)
-logger.info(f"Loaded {len(nlp)} Spacy models in {time.perf_counter() - start:.6}s")
+
+class SpacyModels(dict):
+    # Models are loaded on first use per language, without the pipes lemmatization doesn't need
+    def __missing__(self, lang_code: str):
+        import spacy
+
+        start = time.perf_counter()
+        model = spacy.load(settings.SPACY_MODELS[lang_code], exclude=settings.SPACY_EXCLUDE)
+        self[lang_code] = model
+        logger.info(
+            f"Loaded Spacy model {settings.SPACY_MODELS[lang_code]} with pipes {model.pipe_names} "
+            f"in {time.perf_counter() - start:.6}s"
+        )
+        return model
+
+
+nlp = SpacyModels()
+lemma_cache = LemmaCache(maxsize=settings.LEMMA_CACHE_SIZE, path=settings.LEMMA_CACHE_PATH)
 
 
 EXCEPTIONS = {
@@ -107,23 +124,124 @@ def process_exceptions(lang_code: str, word: str) -> str:
     return EXCEPTIONS.get(lang_code, {}).get(word, word)
 
 
+@cache
+def model_version(model: str) -> str:
+    try:
+        return version(model)
+    except PackageNotFoundError:
+        return ""
+
+
+@cache
+def tables_version(lang_code: str) -> str:
+    # Changes whenever exceptions / fake propns / stop words or the model change, invalidating cached lemmas.
+    # Computed once per language: call tables_version.cache_clear() after changing the tables at runtime
+    model = settings.SPACY_MODELS.get(lang_code, "")
+    tables = [
+        EXCEPTIONS.get(lang_code, {}),
+        FAKE_PROPNS.get(lang_code, []),
+        STOP_WORDS.get(lang_code, []),
+        model,
+        model_version(model),
+        settings.SPACY_EXCLUDE,
+    ]
+    return hashlib.sha1(json.dumps(tables, sort_keys=True).encode()).hexdigest()[:16]
+
+
 def lemmatize(
     lang_code: str,
     sentence: str,
     skip_propns: bool = False,
     skip_words: list | None = None,
+    two_pass: bool = False,
+    use_cache: bool = True,
 ) -> list[str]:
     if not skip_words:
         skip_words = STOP_WORDS.get(lang_code, [])
+
+    key = None
+    if use_cache and not two_pass:
+        key = lemma_cache.make_key(tables_version(lang_code), lang_code, skip_propns, skip_words, sentence)
+        lemmas = lemma_cache.get(key)
+        if lemmas is not None:
+            return lemmas
+
     doc = nlp[lang_code](sentence)
-    l_doc = nlp[lang_code](sentence.lower())
+
+    # Avoid wrongly detecting capitalized words as PROPN (e.g. Hola amigo -> hola should be VERB, not PROPN)
+    # Except this doesn't catch "hola", so we also have a list of fake propns.
+    # Lowercased sentence is parsed only when some token needs this fixup, unless two_pass is requested
+    l_doc = None
+    if two_pass or any(is_capitalized_propn(token) for token in doc):
+        l_doc = nlp[lang_code](sentence.lower())
+
+    lemmas = lemmas_from_doc(lang_code, doc, l_doc, skip_propns=skip_propns, skip_words=skip_words)
+    if key:
+        lemma_cache.set(key, lemmas)
+    return lemmas
+
+
+def lemmatize_many(
+    lang_code: str,
+    sentences: list[str],
+    skip_propns: bool = False,
+    skip_words: list | None = None,
+    batch_size: int | None = None,
+    n_process: int | None = None,
+    use_cache: bool = True,
+) -> list[list[str]]:
+    if not skip_words:
+        skip_words = STOP_WORDS.get(lang_code, [])
+    batch_size = batch_size or settings.SPACY_BATCH_SIZE
+    n_process = n_process or settings.SPACY_N_PROCESS
+
+    result: list[list[str] | None] = [None] * len(sentences)
+    keys = [None] * len(sentences)
+    if use_cache:
+        t_version = tables_version(lang_code)
+        for i, sentence in enumerate(sentences):
+            keys[i] = lemma_cache.make_key(t_version, lang_code, skip_propns, skip_words, sentence)
+            result[i] = lemma_cache.get(keys[i])
+
+    # Only cache misses go through the pipeline, each distinct sentence once
+    to_parse = list(dict.fromkeys(sentence for sentence, lemmas in zip(sentences, result) if lemmas is None))
+    docs = list(nlp[lang_code].pipe(to_parse, batch_size=batch_size, n_process=n_process)) if to_parse else []
+
+    # Same PROPN fixup as in lemmatize: lowercased copies are parsed only for sentences that need it
+    to_fix = [i for i, doc in enumerate(docs) if any(is_capitalized_propn(token) for token in doc)]
+    l_docs = dict(
+        zip(
+            to_fix,
+            nlp[lang_code].pipe((to_parse[i].lower() for i in to_fix), batch_size=batch_size, n_process=n_process),
+        )
+    )
+
+    parsed = {
+        sentence: lemmas_from_doc(lang_code, doc, l_docs.get(i), skip_propns=skip_propns, skip_words=skip_words)
+        for i, (sentence, doc) in enumerate(zip(to_parse, docs))
+    }
+    to_cache = {}
+    for i, sentence in enumerate(sentences):
+        if result[i] is None:
+            result[i] = list(parsed[sentence])
+            if keys[i]:
+                to_cache[keys[i]] = parsed[sentence]
+    lemma_cache.set_many(list(to_cache.items()))
+
+    return result
+
+
+def is_capitalized_propn(token) -> bool:
+    return token.is_alpha and token.pos_ == "PROPN" and token.lemma_[0].isupper()
+
+
+def lemmas_from_doc(lang_code: str, doc, l_doc, skip_propns: bool, skip_words: list) -> list[str]:
     lemmas = []
-    for token, l_token in zip(doc, l_doc):
+    tokens = zip(doc, l_doc) if l_doc is not None else ((token, None) for token in doc)
+    for token, l_token in tokens:
         if not token.is_alpha:
             continue
-        # Avoid wrongly detecting capitalized words as PROPN (e.g. Hola amigo -> hola should be VERB, not PROPN)
-        # Except this doesn't catch "hola", so we also have a list of fake propns
-        if token.pos_ == "PROPN" and token.lemma_[0].isupper() and l_token.pos_ != "PROPN":
+        if l_token is not None and is_capitalized_propn(token) and l_token.pos_ != "PROPN":
             token = l_token
         if skip_propns and token.pos_ == "PROPN" and token.lemma_ not in FAKE_PROPNS[lang_code]:
             continue
@@ -1,26 +1,231 @@
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Annotated, Iterable
 from uuid import UUID, uuid4
 
-from beanie import Document
-from pydantic import Field
+from beanie import Document, Indexed
+from beanie.exceptions import RevisionIdWasChanged
+from bson import Binary
+from loguru import logger
+from pydantic import BaseModel, Field
+from pymongo import IndexModel, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
-from backend.babble.lemmas import lemmatize
+from backend.babble.index import SENTENCE_INDEX
+from backend.babble.lemmas import lemmatize, lemmatize_many
+from backend.settings import settings
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Versions of SentencesVersion whose changed sentence ids are kept, an index further behind is reloaded whole
+TRACK_SENTENCE_CHANGES = 1000
+
+
+def normalize_text(text: str) -> str:
+    # Case, punctuation and whitespace don't make a sentence different
+    text = unicodedata.normalize("NFC", text).casefold()
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def make_content_hash(text: dict[str, str]) -> str:
+    normalized = {lang: normalize_text(sentence) for lang, sentence in text.items()}
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class SentenceLemmasView(BaseModel):
+    id: UUID = Field(alias="_id")
+    lemmas: dict[str, list[str]] = {}
+
+
+class SentencesVersion(Document):
+    # Bumped on every change of babble sentences, so processes know to update their sentence indexes.
+    # changes[-1] are the ids of sentences changed by the last version, changes[-2] by the one before, and so on
+    id: str = "babble"
+    version: int = 0
+    changes: list[list[UUID]] = []
+
+    class Settings:
+        name = "babble_versions"
+
+    @classmethod
+    async def bump(cls, ids: Iterable[UUID]) -> int:
+        # Version and changes are updated together, so changes always line up with versions
+        doc = await cls.get_motor_collection().find_one_and_update(
+            {"_id": "babble"},
+            {
+                "$inc": {"version": 1},
+                "$push": {
+                    "changes": {"$each": [[Binary.from_uuid(id) for id in ids]], "$slice": -TRACK_SENTENCE_CHANGES}
+                },
+            },
+            {"version": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc["version"]
+
+    @classmethod
+    async def get_version(cls) -> int:
+        doc = await cls.get_motor_collection().find_one({"_id": "babble"}, {"version": 1})
+        return doc["version"] if doc else 0
+
+    @classmethod
+    async def get_changes(cls, since: int) -> tuple[int, set[UUID] | None]:
+        # Current version and ids of sentences changed after version since, None if they aren't all kept
+        collection = cls.get_motor_collection()
+        for _ in range(3):
+            version = await cls.get_version()
+            missing = version - since
+            if missing == 0:
+                return version, set()
+            if missing < 0 or missing > TRACK_SENTENCE_CHANGES:
+                return version, None
+            doc = await collection.find_one({"_id": "babble"}, {"version": 1, "changes": {"$slice": -missing}})
+            if doc["version"] != version:
+                continue  # bumped in between, the slice doesn't start after since
+            changes = cls.model_validate(doc).changes
+            if len(changes) < missing:
+                return version, None
+            return version, {id for ids in changes for id in ids}
+        return version, None
 
 
 class BabbleSentence(Document):
     id: UUID = Field(default_factory=uuid4)
     text: dict[str, str]  # {"en": "I went"}
     lemmas: dict[str, list[str]] = {}  # {"en": ["I", "go"]}
+    # Hash of normalized texts in all languages, unique among sentences that have it
+    content_hash: Annotated[
+        str | None, Indexed(unique=True, partialFilterExpression={"content_hash": {"$type": "string"}})
+    ] = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if not self.lemmas:
             self.update_lemmas()
+        if not self.content_hash:
+            self.update_content_hash()
+
+    def update_content_hash(self):
+        self.content_hash = make_content_hash(self.text)
 
     def update_lemmas(self):
         self.lemmas = {lang: lemmatize(lang, sentence) for lang, sentence in self.text.items()}
 
+    @staticmethod
+    def lemmatize_texts(texts: list[dict[str, str]]) -> list[dict[str, list[str]]]:
+        # Batched update_lemmas: one nlp.pipe run per language for all texts
+        lemmas = [{} for _ in texts]
+        by_lang = {}
+        for i, text in enumerate(texts):
+            for lang in text:
+                by_lang.setdefault(lang, []).append(i)
+        for lang, indexes in by_lang.items():
+            for i, text_lemmas in zip(indexes, lemmatize_many(lang, [texts[i][lang] for i in indexes])):
+                lemmas[i][lang] = text_lemmas
+        return lemmas
+
+    @classmethod
+    def update_lemmas_many(cls, sentences: list["BabbleSentence"]):
+        for sentence, lemmas in zip(sentences, cls.lemmatize_texts([sentence.text for sentence in sentences])):
+            sentence.lemmas = lemmas
+
+    @classmethod
+    def from_texts(cls, texts: list[dict[str, str]]) -> list["BabbleSentence"]:
+        return [cls(text=text, lemmas=lemmas) for text, lemmas in zip(texts, cls.lemmatize_texts(texts))]
+
+    @classmethod
+    async def insert_new(cls, documents) -> list["BabbleSentence"]:
+        # Unordered bulk insert in one round-trip, sentences already stored (same content hash) are skipped.
+        # Duplicates are rejected by the unique index, so this is safe with concurrent generators
+        unique = {}
+        for document in documents:
+            document.update_content_hash()
+            unique.setdefault(document.content_hash, document)
+        documents = list(unique.values())
+        if not documents:
+            return []
+        try:
+            await cls.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details["writeErrors"]
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            failed = {error["index"] for error in errors}
+            return [document for i, document in enumerate(documents) if i not in failed]
+        return documents
+
+    async def save_unique(self, delete_duplicate: bool = True) -> bool:
+        # save for sentences stored with an older content hash (or none), which can turn out to have the same
+        # content as another sentence: returns False then, and deletes this one with delete_duplicate
+        try:
+            await self.save()
+        except (DuplicateKeyError, RevisionIdWasChanged):
+            # save upserts, and beanie reports duplicate keys of upserts as RevisionIdWasChanged
+            logger.warning(f"Duplicate sentence {self.id}: {self.text}")
+            if delete_duplicate:
+                await self.delete()
+            return False
+        return True
+
+    # Keep in-memory sentence index in sync with the collection, and other processes' indexes notified
+    @classmethod
+    async def insert_many(cls, documents, *args, **kwargs):
+        documents = list(documents)
+        for document in documents:
+            document.update_content_hash()
+        try:
+            result = await super().insert_many(documents, *args, **kwargs)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details["writeErrors"]}
+            if kwargs.get("ordered", True):
+                failed = set(range(min(failed), len(documents)))
+            inserted = [document for i, document in enumerate(documents) if i not in failed]
+            for document in inserted:
+                SENTENCE_INDEX.add(document.id, document.lemmas)
+            if inserted:
+                SENTENCE_INDEX.saved(await SentencesVersion.bump(document.id for document in inserted))
+            raise
+        for document in documents:
+            SENTENCE_INDEX.add(document.id, document.lemmas)
+        SENTENCE_INDEX.saved(await SentencesVersion.bump(document.id for document in documents))
+        return result
+
+    async def insert(self, *args, **kwargs):
+        self.update_content_hash()
+        result = await super().insert(*args, **kwargs)
+        SENTENCE_INDEX.add(self.id, self.lemmas)
+        SENTENCE_INDEX.saved(await SentencesVersion.bump([self.id]))
+        return result
+
+    async def save(self, *args, **kwargs):
+        self.update_content_hash()
+        result = await super().save(*args, **kwargs)
+        SENTENCE_INDEX.add(self.id, self.lemmas)
+        SENTENCE_INDEX.saved(await SentencesVersion.bump([self.id]))
+        return result
+
+    async def replace(self, *args, **kwargs):
+        self.update_content_hash()
+        result = await super().replace(*args, **kwargs)
+        SENTENCE_INDEX.add(self.id, self.lemmas)
+        SENTENCE_INDEX.saved(await SentencesVersion.bump([self.id]))
+        return result
+
+    async def delete(self, *args, **kwargs):
+        result = await super().delete(*args, **kwargs)
+        SENTENCE_INDEX.remove(self.id)
+        SENTENCE_INDEX.saved(await SentencesVersion.bump([self.id]))
+        return result
+
     class Settings:
         name = "babble"
+        indexes = [
+            *(IndexModel(f"lemmas.{lang}") for lang in settings.LANGUAGES),
+            *(IndexModel(f"text.{lang}") for lang in settings.LANGUAGES),
+        ]
 
 
-babble_models = [BabbleSentence]
+babble_models = [BabbleSentence, SentencesVersion]
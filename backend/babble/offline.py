@@ -0,0 +1,142 @@
+import hashlib
+import random
+from typing import AsyncIterator, Optional
+
+from backend.settings import settings
+
+# Word by word translations used by OfflineSentences, words missing here are left as is
+TRANSLATIONS: dict[tuple[str, str], dict[str, str]] = {
+    ("es", "en"): {
+        "a": "to",
+        "agua": "water",
+        "amigo": "friend",
+        "aquí": "here",
+        "ayuda": "help",
+        "bien": "well",
+        "casa": "house",
+        "comida": "food",
+        "con": "with",
+        "de": "of",
+        "decir": "say",
+        "día": "day",
+        "el": "the",
+        "en": "in",
+        "estar": "be",
+        "favor": "favor",
+        "gracias": "thanks",
+        "haber": "have",
+        "hacer": "do",
+        "hola": "hello",
+        "hombre": "man",
+        "hoy": "today",
+        "ir": "go",
+        "mal": "bad",
+        "mujer": "woman",
+        "necesitar": "need",
+        "no": "no",
+        "o": "or",
+        "para": "for",
+        "pero": "but",
+        "poder": "can",
+        "por": "for",
+        "que": "that",
+        "querer": "want",
+        "saber": "know",
+        "sentir": "feel",
+        "ser": "be",
+        "sí": "yes",
+        "tener": "have",
+        "tiempo": "time",
+        "tu": "your",
+        "tú": "you",
+        "uno": "one",
+        "ver": "see",
+        "y": "and",
+        "yo": "I",
+        "él": "he",
+    },
+}
+
+TEMPLATES: dict[str, list[str]] = {
+    "es": ["{} {}.", "{} {} {}.", "¿{} {}?", "{}, {} {}.", "¡{} {} {}!", "{} {} {} {}."],
+    "default": ["{} {}.", "{} {} {}.", "{} {}?", "{}, {} {}.", "{} {} {}!", "{} {} {} {}."],
+}
+# Used when there are too few words for any of TEMPLATES, e.g. in the first lesson with no known words
+ONE_WORD_TEMPLATES: dict[str, list[str]] = {
+    "es": ["{}.", "¡{}!", "¿{}?"],
+    "default": ["{}.", "{}!", "{}?"],
+}
+
+
+class OfflineSentences:
+    """Deterministic sentence source for tests and benchmarks: no network, same input gives the same sentences.
+
+    Sentences are templates filled with words from the dictionary (and exactly one required word in each when
+    given) and translated word by word with TRANSLATIONS.
+    """
+
+    lang_codes: dict[str, str]
+
+    def __init__(self, client=None):
+        self.lang_codes = settings.LANGUAGES
+
+    def make_sentence(
+        self, words: list[str], template: int, base_language: str, templates: dict[str, list[str]] = TEMPLATES
+    ) -> dict[str, str]:
+        sentence = {}
+        for code in self.lang_codes:
+            table = TRANSLATIONS.get((base_language, code), {})
+            text = templates.get(code, templates["default"])[template].format(
+                *(table.get(word, word) for word in words)
+            )
+            first = next((i for i, char in enumerate(text) if char.isalpha()), 0)
+            sentence[code] = text[:first] + text[first : first + 1].upper() + text[first + 1 :]
+        return sentence
+
+    async def generate_senteces(
+        self,
+        dictionary: list[str],
+        req_dictionary: Optional[list[str]] = None,
+        base_language: str = "es",
+        N: int = 40,
+    ) -> list[dict[str, str]]:
+        seed = hashlib.sha1(repr((sorted(dictionary), sorted(req_dictionary or []), base_language)).encode())
+        rng = random.Random(seed.digest())
+        required = sorted(req_dictionary or [])
+        words = sorted(set(dictionary) - set(required))
+        available = len(words) + bool(required)
+        templates = TEMPLATES
+        fitting = [
+            i
+            for i, template in enumerate(templates.get(base_language, templates["default"]))
+            if template.count("{}") <= available
+        ]
+        if not fitting and available:
+            templates = ONE_WORD_TEMPLATES
+            fitting = list(range(len(templates.get(base_language, templates["default"]))))
+
+        result = []
+        seen = set()
+        for _ in range(N * 5):
+            if len(result) >= N or not fitting:
+                break
+            template = fitting[rng.randrange(len(fitting))]
+            size = templates.get(base_language, templates["default"])[template].count("{}")
+            sentence_words = rng.sample(words, size - bool(required))
+            if required:
+                sentence_words.insert(rng.randrange(size), rng.choice(required))
+            sentence = self.make_sentence(sentence_words, template, base_language, templates)
+            if sentence[base_language] not in seen:
+                seen.add(sentence[base_language])
+                result.append(sentence)
+        return result
+
+    async def stream_senteces(
+        self,
+        dictionary: list[str],
+        req_dictionary: Optional[list[str]] = None,
+        base_language: str = "es",
+        N: int = 40,
+    ) -> AsyncIterator[dict[str, str]]:
+        for sentence in await self.generate_senteces(dictionary, req_dictionary, base_language, N):
+            yield sentence
@@ -0,0 +1,53 @@
+import json
+
+
+class ArrayObjectsParser:
+    """Incremental parser returning each JSON object that is an element of an array as soon as it closes.
+
+    Works for {"sentences": [{...}, ...]} and bare [{...}, ...] alike, ignoring anything outside of JSON
+    (e.g. markdown fences around the content).
+    """
+
+    def __init__(self):
+        self.stack: list[str] = []
+        self.in_string = False
+        self.escape = False
+        self.current: list[str] | None = None
+        self.current_depth = 0
+        self.errors = 0
+
+    def feed(self, chunk: str) -> list[dict]:
+        objects = []
+        for char in chunk:
+            if self.current is not None:
+                self.current.append(char)
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char == "{" or char == "[":
+                if char == "{" and self.current is None and self.stack and self.stack[-1] == "[":
+                    self.current = [char]
+                    self.current_depth = len(self.stack)
+                self.stack.append(char)
+            elif char == "}" or char == "]":
+                if self.stack:
+                    self.stack.pop()
+                if self.current is not None and len(self.stack) == self.current_depth:
+                    try:
+                        value = json.loads("".join(self.current))
+                    except json.JSONDecodeError:
+                        self.errors += 1
+                    else:
+                        if isinstance(value, dict):
+                            objects.append(value)
+                    self.current = None
+        return objects
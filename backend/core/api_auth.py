@@ -30,7 +30,7 @@ def login_user(user: User) -> Response:
 async def login_handler(data: LoginData) -> Response:
     user = await User.by_email(data.email)
 
-    if user and user.verify_password(data.password):
+    if user and await user.verify_password_async(data.password):
         return login_user(user)
 
     return Response(
@@ -53,7 +53,7 @@ async def me_handler(request: Request) -> JWTUser:
 @post("/change-password")
 async def change_password_handler(request: Request, data: PasswordData) -> Response:
     user = await User.get(request.user.id)
-    user.set_password(data.password)
+    await user.set_password_async(data.password)
     await user.save()
     return Response({"okie": "dokie"})
 
@@ -1,10 +1,18 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 from jose import jwt
 
 from backend.settings import settings
 
-_hasher = PasswordHasher()
+_hasher = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+_executor: Executor | None = None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -18,6 +26,34 @@ def get_password_hash(password: str) -> str:
     return _hasher.hash(password)
 
 
+def get_executor() -> Executor:
+    # Hashing is CPU bound and takes tens of ms, so it runs on a bounded pool instead of the event loop
+    global _executor
+    if _executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), get_password_hash, password)
+
+
 def encode_jwt_token(claims: dict) -> str:
     return jwt.encode(
         claims,
@@ -0,0 +1,45 @@
+from beanie import Document, init_beanie
+from loguru import logger
+from pydantic import BaseModel
+
+
+class IndexReport(BaseModel):
+    collection: str
+    created: list[str] = []
+    dropped: list[str] = []
+
+
+async def ensure_indexes(models: list[type[Document]], drop: bool = False) -> list[IndexReport]:
+    # Indexes are declared in Settings.indexes and with Indexed() fields, and created by init_beanie. Running it
+    # again creates the missing ones and, with drop, drops indexes nobody declares; this reports what changed
+    collections = {model: model.get_motor_collection() for model in models}
+    before = {model: set(await collection.index_information()) for model, collection in collections.items()}
+    database = collections[models[0]].database
+    await init_beanie(database=database, document_models=models, allow_index_dropping=drop)
+
+    reports = []
+    for model, collection in collections.items():
+        after = set(await collection.index_information())
+        report = IndexReport(
+            collection=collection.name, created=sorted(after - before[model]), dropped=sorted(before[model] - after)
+        )
+        if report.created or report.dropped:
+            logger.info(f"Indexes of {report.collection}: created {report.created}, dropped {report.dropped}")
+        reports.append(report)
+    return reports
+
+
+def plan_stages(plan: dict) -> list[str]:
+    # All stage names of an explain() plan tree
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+
+async def query_stages(model: type[Document], query: dict) -> list[str]:
+    explain = await model.get_motor_collection().find(query).explain()
+    return plan_stages(explain["queryPlanner"]["winningPlan"])
@@ -0,0 +1,86 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, Iterable, TypeVar
+from uuid import UUID
+
+from backend.babble.models import BabbleSentence, SentenceLemmasView
+from backend.dictionary.models import DICTIONARIES, TranslationsView
+from backend.dictionary.snapshot import DICTIONARY_SNAPSHOTS
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """Batches and caches lookups by key for the lifetime of the loader (one request).
+
+    Keys asked for in the same event loop step, e.g. by coroutines gathered together, are resolved with one
+    call of batch_load; a key is never fetched twice. Missing keys resolve to None.
+    """
+
+    def __init__(self, batch_load: Callable[[list[K]], Awaitable[dict[K, V]]]):
+        self.batch_load = batch_load
+        self.cache: dict[K, asyncio.Future] = {}
+        self.queue: list[K] = []
+        self.batches = 0
+        self.tasks: set[asyncio.Task] = set()
+
+    def load(self, key: K) -> Awaitable[V | None]:
+        if key not in self.cache:
+            self.cache[key] = asyncio.get_running_loop().create_future()
+            self.queue.append(key)
+            if len(self.queue) == 1:
+                task = asyncio.create_task(self.dispatch())
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+        return self.cache[key]
+
+    async def load_many(self, keys: Iterable[K]) -> dict[K, V]:
+        # Found values only
+        futures = {key: self.load(key) for key in keys}
+        values = await asyncio.gather(*futures.values())
+        return {key: value for key, value in zip(futures, values) if value is not None}
+
+    async def dispatch(self):
+        # Let the other tasks scheduled for this loop step queue their keys too
+        await asyncio.sleep(0)
+        keys, self.queue = self.queue, []
+        self.batches += 1
+        try:
+            found = await self.batch_load(keys)
+        except Exception as e:
+            for key in keys:
+                self.cache.pop(key).set_exception(e)
+            return
+        for key in keys:
+            self.cache[key].set_result(found.get(key))
+
+
+class Loaders:
+    # Request-scoped loaders, provided to handlers as the "loaders" dependency
+
+    def __init__(self):
+        self.sentences: DataLoader[UUID, BabbleSentence] = DataLoader(self.load_sentences)
+        self.sentence_lemmas: DataLoader[UUID, SentenceLemmasView] = DataLoader(self.load_sentence_lemmas)
+        self.translation_loaders: dict[str, DataLoader[str, dict[str, list[str]]]] = {}
+
+    def translations(self, lang: str) -> DataLoader[str, dict[str, list[str]]]:
+        # Translations of words of lang to all languages
+        if lang not in self.translation_loaders:
+
+            async def load_translations(words: list[str]) -> dict[str, dict[str, list[str]]]:
+                if DICTIONARY_SNAPSHOTS.is_loaded(lang):
+                    return DICTIONARY_SNAPSHOTS[lang].get_translations(words)
+                data = await DICTIONARIES[lang].find({"_id": {"$in": words}}).project(TranslationsView).to_list()
+                return {word.id: word.translations for word in data}
+
+            self.translation_loaders[lang] = DataLoader(load_translations)
+        return self.translation_loaders[lang]
+
+    @staticmethod
+    async def load_sentences(ids: list[UUID]) -> dict[UUID, BabbleSentence]:
+        return {sentence.id: sentence for sentence in await BabbleSentence.find({"_id": {"$in": ids}}).to_list()}
+
+    @staticmethod
+    async def load_sentence_lemmas(ids: list[UUID]) -> dict[UUID, SentenceLemmasView]:
+        data = await BabbleSentence.find({"_id": {"$in": ids}}).project(SentenceLemmasView).to_list()
+        return {sentence.id: sentence for sentence in data}
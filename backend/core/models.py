@@ -5,7 +5,7 @@ from uuid import UUID, uuid4
 from beanie import Document, Indexed
 from pydantic import BaseModel, Field
 
-from backend.core.crypto import get_password_hash, verify_password
+from backend.core.crypto import get_password_hash, get_password_hash_async, verify_password, verify_password_async
 
 
 class JWTUser(BaseModel):
@@ -41,7 +41,7 @@ class User(Document):
     async def create_user(cls, email: str, nickname: str, password: str) -> "User":
         from backend.courses.models import UserProgress
 
-        user = User(nickname=nickname, email=email, password_hash=get_password_hash(password))
+        user = User(nickname=nickname, email=email, password_hash=await get_password_hash_async(password))
         await asyncio.gather(
             user.insert(),
             UserProgress(id=user.id).insert(),
@@ -56,10 +56,18 @@ class User(Document):
     def set_password(self, password: str):
         self.password_hash = get_password_hash(password)
 
+    async def set_password_async(self, password: str):
+        self.password_hash = await get_password_hash_async(password)
+
     def verify_password(self, password: str) -> bool:
         if not self.password_hash:
             return False
         return verify_password(password, self.password_hash)
 
+    async def verify_password_async(self, password: str) -> bool:
+        if not self.password_hash:
+            return False
+        return await verify_password_async(password, self.password_hash)
+
 
 core_models = [User]
@@ -1,5 +1,56 @@
 import json
 from pathlib import Path
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+
+class CourseData(BaseModel):
+    version: int  # file mtime, changes when course file is edited
+    words: list[str]  # ordered as in course file (most frequent first)
+    rank: dict[str, int]
+    frequency: dict[str, int]
+    total_frequency: int
+
+    @classmethod
+    def from_frequency(cls, version: int, frequency: dict[str, int]) -> "CourseData":
+        words = list(frequency.keys())
+        return cls(
+            version=version,
+            words=words,
+            rank={word: i for i, word in enumerate(words)},
+            frequency=frequency,
+            total_frequency=sum(frequency.values()),
+        )
+
+
+class CourseRegistry:
+    # Course files are parsed once and reloaded only when their mtime changes
+
+    def __init__(self):
+        self.files: dict[Path, tuple[int, Any]] = {}
+
+    def load(self, path: Path, build: Callable[[int, Any], Any] = lambda version, data: data) -> Any:
+        version = path.stat().st_mtime_ns
+        cached = self.files.get(path)
+        if cached and cached[0] == version:
+            return cached[1]
+        with path.open() as f:
+            data = build(version, json.load(f))
+        self.files[path] = (version, data)
+        return data
+
+    def get_course(self, lang: str, course: str) -> CourseData:
+        return self.load(Path(lang) / f"{course}.json", CourseData.from_frequency)
+
+    def get_base_words(self, lang: str) -> list[str]:
+        return self.load(Path(lang) / "base.json")
+
+    def clear(self):
+        self.files.clear()
+
+
+COURSES = CourseRegistry()
 
 
 def get_courses_list(lang: str) -> list[str]:
@@ -7,26 +58,21 @@ def get_courses_list(lang: str) -> list[str]:
     return [f.name[:-5] for f in p.iterdir() if f.is_file() and f.name.endswith(".json") and f.name != "base.json"]
 
 
-def get_base_words(lang: str):
-    p = Path(lang) / "base.json"
-    with p.open() as f:
-        return json.load(f)
+def get_base_words(lang: str) -> list[str]:
+    return list(COURSES.get_base_words(lang))
 
 
 def get_course_data(lang: str, course: str) -> dict[str, int]:
-    p = Path(lang) / f"{course}.json"
-    with p.open() as f:
-        return json.load(f)
+    # Shared cached dict, don't modify
+    return COURSES.get_course(lang, course).frequency
 
 
 def get_course_words(lang: str, course: str) -> list[str]:
-    data = get_course_data(lang, course)
-
-    return list(data.keys())
+    return list(COURSES.get_course(lang, course).words)
 
 
 def get_new_words(lang: str, course: str, known_words: str, N: int = 5) -> list[str]:
-    course_words = get_course_words(lang, course)
+    course_words = COURSES.get_course(lang, course).words
     new_words = []
     for word in course_words:
         if word not in known_words:
@@ -1,14 +1,18 @@
-import asyncio
-
-from beanie.operators import In
 from litestar import get, post
+from litestar.di import Provide
 from pydantic import BaseModel
 
-from backend.babble.babble import get_sentences
-from backend.babble.models import BabbleSentence
-from backend.courses.courses import get_course_data
-from backend.courses.models import Exercise, ExerciseResult, UserProgress
-from backend.dictionary.models import DICTIONARIES
+from backend.babble.babble import get_sentences_for_words
+from backend.core.loaders import Loaders
+from backend.courses.models import (
+    EXERCISES_PER_NEW_WORD,
+    NEW_WORDS_PER_LESSON,
+    Exercise,
+    ExerciseResult,
+    UserProgress,
+)
+from backend.courses.updates import save_exercise_results, save_language_fields
+from backend.courses.worker import SENTENCE_WORKER
 
 
 class WordsStats(BaseModel):
@@ -28,37 +32,36 @@ async def get_user_stats(user_id: str) -> dict[str, dict[str, WordsStats]]:
 
     for lang, lang_data in user_progress.languages.items():
         result[lang] = {}
+        any_rebuilt = False
         for course in lang_data.courses:
-            c_data = get_course_data(lang, course)
-            total_count = len(c_data)
-
-            encountered = len([word for word in lang_data.words if word in c_data])
-            new_words = len(
-                [word for word, w_data in lang_data.words.items() if word in c_data and w_data.seen_times < 5]
-            )
-            bad = len([word for word in lang_data.get_bad_words() if word in c_data])
-            understanding_count = sum(c_data[word] for word in lang_data.words if word in c_data)
-            total = sum(count for count in c_data.values())
+            course_data = lang_data.find_course(course)
+            if course_data is None:
+                continue
+            stats, rebuilt = lang_data.get_course_stats(course)
+            any_rebuilt |= rebuilt
 
             result[lang][course] = WordsStats(
-                total_count=total_count,
-                encountered=encountered,
-                new=new_words,
-                bad=bad,
-                understanding_rate=int(understanding_count / total * 100),
+                total_count=len(course_data.words),
+                encountered=stats.encountered,
+                new=stats.new,
+                bad=stats.bad,
+                understanding_rate=int(stats.understanding_count / course_data.total_frequency * 100),
                 exercises=lang_data.total_exercises,
             )
+        if any_rebuilt:
+            # The whole map: course names may contain dots, so a course can't be addressed by path
+            await save_language_fields(user_progress.id, lang, lang_data, ["course_stats"])
 
     return result
 
 
 @get("/user/{user_id:str}/exercises")
-async def get_user_exercises(user_id: str, lang: str) -> list[Exercise]:
+async def get_user_exercises(user_id: str, lang: str, loaders: Loaders) -> list[Exercise]:
     user_progress = await UserProgress.get(user_id)
     sentences = await user_progress.get_sentences(lang)
-    all_words = sum((sentence.lemmas[lang] for sentence in sentences), start=[])
-    all_translations = await DICTIONARIES[lang].find({"_id": {"$in": all_words}}).to_list()
-    full_dict = {translation.id: translation.translations["en"] for translation in all_translations}
+    all_words = {word for sentence in sentences for word in sentence.lemmas[lang]}
+    translations = await loaders.translations(lang).load_many(all_words)
+    full_dict = {word: word_translations["en"] for word, word_translations in translations.items()}
     return [
         Exercise(
             type="word_bank",
@@ -72,23 +75,34 @@ async def get_user_exercises(user_id: str, lang: str) -> list[Exercise]:
 
 @get("/user/{user_id:str}/exercises/new_words")
 async def get_user_exercises_new_words(
-    user_id: str, lang: str, course: str, N: int = 4, exercises_per_word: int = 2
+    user_id: str,
+    lang: str,
+    course: str,
+    loaders: Loaders,
+    N: int = NEW_WORDS_PER_LESSON,
+    exercises_per_word: int = EXERCISES_PER_NEW_WORD,
 ) -> list[Exercise]:
     user_progress = await UserProgress.get(user_id)
+    lang_data = user_progress.languages.get(lang)
+    frontier = lang_data and lang_data.course_frontiers.get(course)
+    stored = frontier and (frontier.version, frontier.index)
     new_words = user_progress.get_new_words(lang, course, N)
+    frontier = user_progress.languages[lang].course_frontiers[course]
+    if lang_data and (frontier.version, frontier.index) != stored:
+        # Rebuilt or advanced; if results were saved meanwhile, they carry an advanced frontier themselves
+        await save_language_fields(user_progress.id, lang, lang_data, ["course_frontiers"])
+
+    sentences = await get_sentences_for_words(
+        dictionary=list(user_progress.languages[lang].words.keys()),
+        words=new_words,
+        base_language=lang,
+        exclude_ids=user_progress.languages[lang].last_exercises,
+        N=exercises_per_word,
+    )
 
-    sentences = {}
-    for word in new_words:
-        sentences[word] = await get_sentences(
-            dictionary=list(user_progress.languages[lang].words.keys()),
-            req_dictionary=[word],
-            base_language=lang,
-            exclude_ids=user_progress.languages[lang].last_exercises,
-            N=exercises_per_word,
-        )
-
-    all_words = sum((sentence.lemmas[lang] for ss in sentences.values() for sentence in ss), start=[])
-    full_dict = await DICTIONARIES[lang].get_translations(all_words)
+    all_words = {word for ss in sentences.values() for sentence in ss for word in sentence.lemmas[lang]}
+    translations = await loaders.translations(lang).load_many(all_words)
+    full_dict = {word: word_translations["en"] for word, word_translations in translations.items()}
 
     exercises = []
 
@@ -108,20 +122,20 @@ async def get_user_exercises_new_words(
 
 
 @post("/exercise/result")
-async def save_exercise_result(data: ExerciseResult) -> dict:
-    sentences, user_progress = await asyncio.gather(
-        BabbleSentence.find(In(BabbleSentence.id, list(data.results.keys()))).to_list(),
-        UserProgress.get(data.user_id),
-    )
-
-    words_for_sentence = {sentence.id: sentence.lemmas[data.lang] for sentence in sentences}
-
-    for exercise_id, correct in data.results.items():
-        user_progress.languages[data.lang].add_exercise(
-            id=exercise_id, words=words_for_sentence[exercise_id], correct=correct
-        )
-    await user_progress.save()
+async def save_exercise_result(data: ExerciseResult, loaders: Loaders) -> dict:
+    sentences = await loaders.sentence_lemmas.load_many(data.results.keys())
+    words_for_sentence = {id: sentence.lemmas[data.lang] for id, sentence in sentences.items()}
+    results = [(exercise_id, words_for_sentence[exercise_id], correct) for exercise_id, correct in data.results.items()]
+
+    if not await save_exercise_results(data.user_id, data.lang, results):
+        user_progress = await UserProgress.get(data.user_id)
+        for exercise_id, words, correct in results:
+            user_progress.languages[data.lang].add_exercise(id=exercise_id, words=words, correct=correct)
+        await user_progress.save()
+    SENTENCE_WORKER.enqueue(data.user_id, data.lang)
     return {"result": "ok"}
 
 
 user_handlers = [get_user_stats, get_user_exercises, get_user_exercises_new_words, save_exercise_result]
+# Provided per request, so lookups of one request are batched together
+loaders_dependency = {"loaders": Provide(Loaders, sync_to_thread=False)}
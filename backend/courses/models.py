@@ -1,37 +1,139 @@
+import heapq
 import time
+from typing import Callable
 from uuid import UUID
 
 from beanie import Document
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 
 from backend.babble.models import BabbleSentence
-from backend.courses.courses import get_base_words, get_new_words
+from backend.courses.courses import COURSES, CourseData, get_base_words
+from backend.courses.scheduler import START_EASE, review
+from backend.settings import settings
 
 TRACK_CORRECTNESS = 10
+CORRECTNESS_MASK = (1 << TRACK_CORRECTNESS) - 1
 TRACK_LAST_EXERCISES = 100
 
 EXERCISES_PER_LESSON = 8
 WORDS_TO_PRACTICE_PER_LESSON = 4
+NEW_WORDS_PER_LESSON = 4
+EXERCISES_PER_NEW_WORD = 2
+
+NEW_WORD_MAX_SEEN_COUNT = 5
+BAD_WORD_MAX_CORRECTNESS_RATE = 70
 
 
 class WordData(BaseModel):
-    seen_times: int = 0
-    last_seen_ts: int = 0
-    first_seen_ts: int = 0
-    correctness_last_times: list[bool] = []  # for the last 10 times user seen word, did the user use it correctly
-    correctness_rate: int = 0  # percentage based on correctness_last_times
-
-    def add_seen(self, correct: bool | None = None):
-        ts = int(time.time())
+    # Stored for every word of every user, so field names in the DB are one letter long
+    model_config = ConfigDict(populate_by_name=True)
+
+    seen_times: int = Field(0, alias="n")
+    last_seen_ts: int = Field(0, alias="l")
+    first_seen_ts: int = Field(0, alias="f")
+    # Did the user use the word correctly the last (up to 10) times they seen it: bit 0 is the latest result
+    correctness_bits: int = Field(0, alias="c")
+    correctness_count: int = Field(0, alias="k")
+    correctness_rate: int = Field(0, alias="r")  # percentage based on correctness_bits
+    # Spaced repetition schedule (backend.courses.scheduler): next review time, interval in seconds, ease in percent
+    due_ts: int = Field(0, alias="d")
+    interval: int = Field(0, alias="i")
+    ease: int = Field(START_EASE, alias="e")
+
+    @model_validator(mode="before")
+    @classmethod
+    def migrate_correctness_list(cls, data):
+        # Documents stored before bit-packing keep correctness_last_times as a list, converted on load
+        if isinstance(data, dict) and "correctness_last_times" in data:
+            data = dict(data)
+            data["correctness_bits"], data["correctness_count"] = pack_correctness(data.pop("correctness_last_times"))
+        return data
+
+    @property
+    def correctness_last_times(self) -> list[bool]:
+        return [bool(self.correctness_bits >> i & 1) for i in reversed(range(self.correctness_count))]
+
+    @correctness_last_times.setter
+    def correctness_last_times(self, value: list[bool]):
+        self.correctness_bits, self.correctness_count = pack_correctness(value)
+
+    def add_seen(self, correct: bool | None = None, ts: int | None = None):
+        ts = ts or int(time.time())
         self.last_seen_ts = ts
         if not self.first_seen_ts:
             self.first_seen_ts = ts
         self.seen_times += 1
         if correct is not None:
-            self.correctness_last_times.append(correct)
-            self.correctness_last_times = self.correctness_last_times[-TRACK_CORRECTNESS:]
-            self.correctness_rate = sum(self.correctness_last_times) * 100 // len(self.correctness_last_times)
+            self.correctness_bits = (self.correctness_bits << 1 | correct) & CORRECTNESS_MASK
+            self.correctness_count = min(self.correctness_count + 1, TRACK_CORRECTNESS)
+            self.correctness_rate = self.correctness_bits.bit_count() * 100 // self.correctness_count
+            self.interval, self.ease, self.due_ts = review(self.interval, self.ease, self.due_ts, correct, ts)
+
+
+def pack_correctness(correctness: list[bool]) -> tuple[int, int]:
+    correctness = correctness[-TRACK_CORRECTNESS:]
+    bits = 0
+    for correct in correctness:
+        bits = bits << 1 | bool(correct)
+    return bits, len(correctness)
+
+
+class CourseStats(BaseModel):
+    version: int = 0  # version of course file the counters were computed for
+    encountered: int = 0
+    new: int = 0
+    bad: int = 0
+    understanding_count: int = 0  # sum of course frequencies of encountered words
+
+    def count_word(self, course: CourseData, word: str, before: WordData | None, after: WordData):
+        # Apply the change of one word (before=None for newly added word) to the counters
+        if word not in course.frequency:
+            return
+        if before is None:
+            self.encountered += 1
+            self.understanding_count += course.frequency[word]
+        self.new += is_new_word(after) - (before is not None and is_new_word(before))
+        self.bad += is_bad_word(after) - (before is not None and is_bad_word(before))
+
+
+class CourseFrontier(BaseModel):
+    # Where the user is in a course, so new words are found without scanning the course from the start
+    version: int = 0  # version of course file the frontier was computed for
+    index: int = 0  # all course words before it are known
+    skipped: set[str] = set()  # known course words at or after index (learned out of course order)
+
+    def add_known(self, course: CourseData, word: str):
+        if course.rank.get(word, -1) >= self.index:
+            self.skipped.add(word)
+
+    def advance(self, course: CourseData, known: dict):
+        # known (LanguageData.words) is checked too, in case a word was added while the frontier was being rebuilt
+        while self.index < len(course.words) and (
+            course.words[self.index] in self.skipped or course.words[self.index] in known
+        ):
+            self.skipped.discard(course.words[self.index])
+            self.index += 1
+        # Words below the index don't need to be kept, e.g. ones added by a request that didn't advance
+        self.skipped = {word for word in self.skipped if course.rank.get(word, -1) >= self.index}
+
+    def next_words(self, course: CourseData, N: int, known: dict) -> list[str]:
+        self.advance(course, known)
+        new_words = []
+        for i in range(self.index, len(course.words)):
+            if len(new_words) >= N:
+                break
+            if course.words[i] not in self.skipped and course.words[i] not in known:
+                new_words.append(course.words[i])
+        return new_words
+
+
+def is_new_word(data: WordData, max_seen_count: int = NEW_WORD_MAX_SEEN_COUNT) -> bool:
+    return data.seen_times < max_seen_count
+
+
+def is_bad_word(data: WordData, max_correctness_rate: int = BAD_WORD_MAX_CORRECTNESS_RATE) -> bool:
+    return data.correctness_rate < max_correctness_rate
 
 
 class LanguageData(BaseModel):
@@ -43,83 +145,194 @@ class LanguageData(BaseModel):
     active_courses: list[str] = []
     total_exercises: int = 0
     last_exercises: list[UUID] = []
+    course_stats: dict[str, CourseStats] = {}
+    course_frontiers: dict[str, CourseFrontier] = {}
 
-    def add_new_words(self, words: list[str]):
-        ts = int(time.time())
+    _lang: str | None = PrivateAttr(default=None)  # set by UserProgress
+
+    def add_new_words(self, words: list[str], ts: int | None = None):
+        ts = ts or int(time.time())
         self.last_new_word_ts = ts
+        courses = self.get_tracked_courses()
+        frontiers = self.get_tracked_frontiers()
         for word in words:
             if word not in self.words:
                 self.words[word] = WordData()
+                for stats, course in courses:
+                    stats.count_word(course, word, None, self.words[word])
+                for frontier, course in frontiers:
+                    frontier.add_known(course, word)
+        # Advanced as words are learned, so the stored index moves forward with every saved exercise
+        for frontier, course in frontiers:
+            frontier.advance(course, self.words)
 
-    def add_exercise(self, id: UUID, words: list[str], correct: bool = True):
-        ts = int(time.time())
+    def add_exercise(self, id: UUID, words: list[str], correct: bool = True, ts: int | None = None):
+        ts = ts or int(time.time())
         if not self.first_exercise_ts:
             self.first_exercise_ts = ts
         self.last_exercise_ts = ts
         self.total_exercises += 1
         new_words = [word for word in words if word not in self.words]
         if new_words:
-            self.add_new_words(new_words)
+            self.add_new_words(new_words, ts)
+        courses = self.get_tracked_courses()
         for word in words:
-            self.words[word].add_seen(correct)
+            before = self.words[word].model_copy() if courses else None
+            self.words[word].add_seen(correct, ts)
+            for stats, course in courses:
+                stats.count_word(course, word, before, self.words[word])
         self.last_exercises.append(id)
         self.last_exercises = self.last_exercises[-TRACK_LAST_EXERCISES:]
 
-    def get_new_words(self, max_seen_count=5) -> set[str]:
+    def get_new_words(self, max_seen_count=NEW_WORD_MAX_SEEN_COUNT) -> set[str]:
         # Return new words (seen count < 5)
-        return set(word for word, data in self.words.items() if data.seen_times < max_seen_count)
+        return set(word for word, data in self.words.items() if is_new_word(data, max_seen_count))
+
+    def get_bad_words(self, max_correctness_rate=BAD_WORD_MAX_CORRECTNESS_RATE) -> set[str]:
+        return set(word for word, data in self.words.items() if is_bad_word(data, max_correctness_rate))
 
-    def get_bad_words(self, max_correctness_rate=70) -> set[str]:
-        return set(word for word, data in self.words.items() if data.correctness_rate < max_correctness_rate)
+    def find_course(self, course_name: str) -> CourseData | None:
+        # Stored course names outlive course files, which can be renamed or removed
+        try:
+            return COURSES.get_course(self._lang, course_name)
+        except FileNotFoundError:
+            logger.warning(f"Course {self._lang}/{course_name} not found")
+            return None
+
+    def get_tracked_courses(self) -> list[tuple[CourseStats, CourseData]]:
+        # Course counters that are up to date and should be updated incrementally; stale ones are dropped
+        # and rebuilt on the next get_course_stats, ones of missing courses are dropped for good
+        if not self._lang or not self.course_stats:
+            return []
+        tracked = []
+        for course_name, stats in list(self.course_stats.items()):
+            course = self.find_course(course_name)
+            if course and stats.version == course.version:
+                tracked.append((stats, course))
+            else:
+                del self.course_stats[course_name]
+        return tracked
+
+    def rebuild_course_stats(self, course_name: str) -> CourseStats:
+        course = COURSES.get_course(self._lang, course_name)
+        stats = CourseStats(version=course.version)
+        for word, data in self.words.items():
+            stats.count_word(course, word, None, data)
+        self.course_stats[course_name] = stats
+        return stats
+
+    def get_course_stats(self, course_name: str) -> tuple[CourseStats, bool]:
+        # Returns counters and whether they had to be rebuilt
+        stats = self.course_stats.get(course_name)
+        if stats and stats.version == COURSES.get_course(self._lang, course_name).version:
+            return stats, False
+        return self.rebuild_course_stats(course_name), True
+
+    def get_tracked_frontiers(self) -> list[tuple[CourseFrontier, CourseData]]:
+        # Same as get_tracked_courses, for course frontiers
+        if not self._lang or not self.course_frontiers:
+            return []
+        tracked = []
+        for course_name, frontier in list(self.course_frontiers.items()):
+            course = self.find_course(course_name)
+            if course and frontier.version == course.version:
+                tracked.append((frontier, course))
+            else:
+                del self.course_frontiers[course_name]
+        return tracked
+
+    def get_course_frontier(self, course_name: str) -> tuple[CourseFrontier, bool]:
+        # Returns the frontier and whether it had to be rebuilt
+        course = COURSES.get_course(self._lang, course_name)
+        frontier = self.course_frontiers.get(course_name)
+        if frontier and frontier.version == course.version:
+            return frontier, False
+        frontier = CourseFrontier(version=course.version, skipped={word for word in self.words if word in course.rank})
+        frontier.advance(course, self.words)
+        self.course_frontiers[course_name] = frontier
+        return frontier, True
+
+    def get_new_course_words(self, course_name: str, N: int) -> list[str]:
+        frontier, _ = self.get_course_frontier(course_name)
+        return frontier.next_words(COURSES.get_course(self._lang, course_name), N, self.words)
+
+    def get_due_words(self, N: int) -> list[str]:
+        # N most overdue words (or due soonest if fewer are due); LanguageData is loaded per request, so
+        # a partial selection in O(n log N) is cheaper than keeping a heap
+        words = self.words
+        return heapq.nsmallest(N, words, key=lambda w: (words[w].due_ts, words[w].last_seen_ts))
 
     def suggest_words_to_practice(self, N: int = WORDS_TO_PRACTICE_PER_LESSON) -> set[str]:
-        # 1. Longest not seen - up to 50% of total amount
-        words = sorted(
-            self.words.keys(),
-            key=lambda w: self.words[w].last_seen_ts,
-        )
-        long_no_seen_words = words[: N // 2]
-        logger.info(f"Words longest not seen for practice: {long_no_seen_words}")
-        suggested = set(long_no_seen_words)
-
-        # 2. New words (the least amount seen, starting from oldest introduced)
-        words = sorted(
-            [word for word in self.words.keys() if word not in suggested],
-            key=lambda w: (self.words[w].seen_times, self.words[w].first_seen_ts),
-        )
-        new_words = words[: N - len(suggested)]
-        logger.info(f"Least seen new words for practice: {new_words}")
-        suggested |= set(new_words)
+        return PRACTICE_STRATEGIES[settings.PRACTICE_STRATEGY](self, N)
+
+
+def suggest_least_seen(lang_data: LanguageData, N: int) -> set[str]:
+    # nsmallest is sorted()[:N] (same order for equal keys) without sorting all the words
+    words = lang_data.words
 
-        return suggested
+    # 1. Longest not seen - up to 50% of total amount
+    long_no_seen_words = heapq.nsmallest(N // 2, words, key=lambda w: words[w].last_seen_ts)
+    logger.info(f"Words longest not seen for practice: {long_no_seen_words}")
+    suggested = set(long_no_seen_words)
+
+    # 2. New words (the least amount seen, starting from oldest introduced)
+    new_words = heapq.nsmallest(
+        N - len(suggested),
+        (word for word in words if word not in suggested),
+        key=lambda w: (words[w].seen_times, words[w].first_seen_ts),
+    )
+    logger.info(f"Least seen new words for practice: {new_words}")
+    suggested |= set(new_words)
+
+    return suggested
+
+
+def suggest_due(lang_data: LanguageData, N: int) -> set[str]:
+    due_words = lang_data.get_due_words(N)
+    logger.info(f"Due words for practice: {due_words}")
+    return set(due_words)
+
+
+# Practice word selection strategies by name, the one used is settings.PRACTICE_STRATEGY
+PRACTICE_STRATEGIES: dict[str, Callable[[LanguageData, int], set[str]]] = {
+    "least_seen": suggest_least_seen,
+    "spaced_repetition": suggest_due,
+}
 
 
 class UserProgress(Document):
     id: UUID
     languages: dict[str, LanguageData] = {}
 
+    @model_validator(mode="after")
+    def set_languages(self) -> "UserProgress":
+        for lang, lang_data in self.languages.items():
+            lang_data._lang = lang
+        return self
+
     def get_new_words(self, lang: str, course: str, N: int = 5) -> list[str]:
         if lang not in self.languages:
             self.languages[lang] = LanguageData()
+            self.languages[lang]._lang = lang
             self.languages[lang].add_new_words(get_base_words(lang))
-        current_words = list(self.languages[lang].words.keys())
-        return get_new_words(lang, course, current_words, N=N)
+        return self.languages[lang].get_new_course_words(course, N)
 
     async def get_sentences(self, lang: str, N: int = EXERCISES_PER_LESSON) -> list[BabbleSentence]:
-        from backend.babble.babble import get_sentences
-
-        suggested = self.languages[lang].suggest_words_to_practice()
-        sentences = []
-        for word in suggested:
-            sentences += await get_sentences(
-                dictionary=list(self.languages[lang].words.keys()),
-                req_dictionary=[word],
-                base_language=lang,
-                exclude_ids=self.languages[lang].last_exercises + [sentence.id for sentence in sentences],
-                N=N // len(suggested),
-            )
-
-        return sentences
+        from backend.babble.babble import get_sentences_for_words
+
+        suggested = list(self.languages[lang].suggest_words_to_practice())
+        if not suggested:
+            return []
+        by_word = await get_sentences_for_words(
+            dictionary=list(self.languages[lang].words.keys()),
+            words=suggested,
+            base_language=lang,
+            exclude_ids=self.languages[lang].last_exercises,
+            N=N // len(suggested),
+            distinct=True,
+        )
+
+        return [sentence for word in suggested for sentence in by_word[word]]
 
     class Settings:
         name = "user_progress"
@@ -0,0 +1,29 @@
+# SM-2 style scheduling of word reviews with a binary grade (the exercise was correct or not).
+# Intervals are in seconds, ease is in percent so that everything stays integer
+DAY = 24 * 60 * 60
+FIRST_INTERVAL = DAY
+SECOND_INTERVAL = 6 * DAY
+MAX_INTERVAL = 365 * DAY
+
+START_EASE = 250
+MIN_EASE = 130
+MAX_EASE = 300
+EASE_BONUS = 10
+EASE_PENALTY = 20
+
+
+def review(interval: int, ease: int, due_ts: int, correct: bool, ts: int) -> tuple[int, int, int]:
+    # Returns new (interval, ease, due_ts) after the word was seen at ts
+    if not correct:
+        # Practice again as soon as possible and grow slower from now on
+        return 0, max(ease - EASE_PENALTY, MIN_EASE), ts
+    if ts < due_ts:
+        # Seen again before it was due (e.g. several times in one lesson), doesn't advance the schedule
+        return interval, ease, due_ts
+    if interval == 0:
+        interval = FIRST_INTERVAL
+    elif interval < SECOND_INTERVAL:
+        interval = SECOND_INTERVAL
+    else:
+        interval = min(interval * ease // 100, MAX_INTERVAL)
+    return interval, min(ease + EASE_BONUS, MAX_EASE), ts + interval
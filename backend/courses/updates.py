@@ -0,0 +1,91 @@
+import time
+from uuid import UUID
+
+from bson import Binary
+
+from backend.courses.models import TRACK_LAST_EXERCISES, LanguageData, UserProgress
+
+# Exercise results are applied with LanguageData.add_exercise as usual, but only the touched words and the lesson
+# fields are written back. The update is guarded by total_exercises, which every submission changes: if another
+# submission was saved in between, nothing matches and the results are applied again to the fresh language data
+MAX_ATTEMPTS = 10
+
+
+def is_path_safe(word: str) -> bool:
+    return "." not in word and not word.startswith("$")
+
+
+def exercise_results_update(
+    lang: str, lang_data: LanguageData, results: list[tuple[UUID, list[str], bool]], ts: int | None = None
+) -> dict:
+    # Applies results (exercise id, sentence lemmas, correct) to lang_data and returns the update doing the same
+    # to the stored document
+    ts = ts or int(time.time())
+    for id, words, correct in results:
+        lang_data.add_exercise(id=id, words=words, correct=correct, ts=ts)
+
+    path = f"languages.{lang}"
+    touched = {word for _, words, _ in results for word in words}
+    changes = {f"{path}.words.{word}": lang_data.words[word].model_dump(by_alias=True) for word in touched}
+    for field in ["first_exercise_ts", "last_exercise_ts", "last_new_word_ts"]:
+        changes[f"{path}.{field}"] = getattr(lang_data, field)
+    # Course names may contain dots, so these maps (one small entry per course) are written whole
+    changes[f"{path}.course_stats"] = {name: stats.model_dump() for name, stats in lang_data.course_stats.items()}
+    changes[f"{path}.course_frontiers"] = {
+        name: frontier.model_dump(mode="json") for name, frontier in lang_data.course_frontiers.items()
+    }
+    return {
+        "$set": changes,
+        "$inc": {f"{path}.total_exercises": len(results)},
+        "$push": {
+            f"{path}.last_exercises": {
+                "$each": [Binary.from_uuid(id) for id, _, _ in results],
+                "$slice": -TRACK_LAST_EXERCISES,
+            }
+        },
+    }
+
+
+def version_filter(user_id: UUID, lang: str, total_exercises: int) -> dict:
+    # Documents saved before total_exercises was added don't have it
+    version = total_exercises if total_exercises else {"$in": [0, None]}
+    return {"_id": Binary.from_uuid(user_id), f"languages.{lang}.total_exercises": version}
+
+
+async def load_language_data(user_id: UUID, lang: str) -> LanguageData | None:
+    doc = await UserProgress.get_motor_collection().find_one(
+        {"_id": Binary.from_uuid(user_id)}, {f"languages.{lang}": 1}
+    )
+    if not doc or lang not in doc.get("languages", {}):
+        return None
+    lang_data = LanguageData.model_validate(doc["languages"][lang])
+    lang_data._lang = lang
+    return lang_data
+
+
+async def save_language_fields(user_id: UUID, lang: str, lang_data: LanguageData, fields: list[str]) -> bool:
+    # Writes fields of lang_data whole, unless exercise results were saved since lang_data was loaded
+    data = lang_data.model_dump(mode="json", include=set(fields))
+    result = await UserProgress.get_motor_collection().update_one(
+        version_filter(user_id, lang, lang_data.total_exercises),
+        {"$set": {f"languages.{lang}.{field}": data[field] for field in fields}},
+    )
+    return result.matched_count == 1
+
+
+async def save_exercise_results(user_id: UUID, lang: str, results: list[tuple[UUID, list[str], bool]]) -> bool:
+    # Returns False if the results weren't written: unaddressable word, no such user or language, or too many
+    # concurrent submissions
+    if not all(is_path_safe(word) for _, words, _ in results for word in words):
+        return False
+    collection = UserProgress.get_motor_collection()
+    for _ in range(MAX_ATTEMPTS):
+        lang_data = await load_language_data(user_id, lang)
+        if lang_data is None:
+            return False
+        version = lang_data.total_exercises
+        update = exercise_results_update(lang, lang_data, results)
+        result = await collection.update_one(version_filter(user_id, lang, version), update)
+        if result.matched_count == 1:
+            return True
+    return False
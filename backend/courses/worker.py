@@ -0,0 +1,152 @@
+import asyncio
+import time
+from contextlib import suppress
+from uuid import UUID
+
+from litestar import get
+from loguru import logger
+from pydantic import BaseModel
+from pymongo import IndexModel
+
+from backend.babble.babble import get_sentences_for_words
+from backend.courses.models import (
+    EXERCISES_PER_LESSON,
+    EXERCISES_PER_NEW_WORD,
+    NEW_WORDS_PER_LESSON,
+    UserProgress,
+)
+from backend.settings import settings
+
+
+class SentenceWorkerStats(BaseModel):
+    running: bool
+    queue_depth: int
+    processed: int
+    failed: int
+    current_lag: float  # seconds the oldest queued job is waiting
+    last_lag: float  # seconds the last started job waited in the queue
+    max_lag: float
+    last_duration: float  # seconds spent pre-generating for a job
+
+
+class SentenceWorker:
+    # Background task that fills per-user sentence buffers, so exercise endpoints don't wait for GPT.
+    # Jobs are (user_id, lang) queued after each exercise result: a job predicts words of the next lessons
+    # (suggested practice words and new course words) and makes sure enough sentences exist for them
+
+    def __init__(self):
+        self.queue: asyncio.Queue[tuple[UUID, str]] = asyncio.Queue()
+        self.pending: dict[tuple[UUID, str], float] = {}
+        self.task: asyncio.Task | None = None
+        self.processed = 0
+        self.failed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_duration = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        if not self.running:
+            self.queue = asyncio.Queue()
+            self.pending.clear()
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    def enqueue(self, user_id: UUID, lang: str):
+        # Repeated results for the same user while a job is waiting are merged into that job
+        key = (user_id, lang)
+        if not self.running or key in self.pending:
+            return
+        self.pending[key] = time.perf_counter()
+        self.queue.put_nowait(key)
+
+    async def run(self):
+        while True:
+            user_id, lang = await self.queue.get()
+            start = time.perf_counter()
+            self.last_lag = start - self.pending.pop((user_id, lang), start)
+            self.max_lag = max(self.max_lag, self.last_lag)
+            try:
+                await self.prefill(user_id, lang)
+                self.processed += 1
+            except Exception:
+                self.failed += 1
+                logger.exception(f"Sentence pre-generation failed for user {user_id} ({lang})")
+            finally:
+                self.queue.task_done()
+            self.last_duration = time.perf_counter() - start
+
+    async def prefill(self, user_id: UUID, lang: str):
+        user_progress = await UserProgress.get(user_id)
+        if not user_progress or lang not in user_progress.languages:
+            return
+        lang_data = user_progress.languages[lang]
+        dictionary = list(lang_data.words.keys())
+        lessons = settings.SENTENCE_BUFFER_LESSONS
+
+        suggested = list(lang_data.suggest_words_to_practice())
+        if suggested:
+            await get_sentences_for_words(
+                dictionary=dictionary,
+                words=suggested,
+                base_language=lang,
+                exclude_ids=lang_data.last_exercises,
+                N=EXERCISES_PER_LESSON // len(suggested) * lessons,
+                distinct=True,
+            )
+
+        for course in lang_data.courses:
+            new_words = user_progress.get_new_words(lang, course, NEW_WORDS_PER_LESSON)
+            if new_words:
+                await get_sentences_for_words(
+                    dictionary=dictionary,
+                    words=new_words,
+                    base_language=lang,
+                    exclude_ids=lang_data.last_exercises,
+                    N=EXERCISES_PER_NEW_WORD * lessons,
+                )
+
+    def stats(self) -> SentenceWorkerStats:
+        return SentenceWorkerStats(
+            running=self.running,
+            queue_depth=self.queue.qsize(),
+            processed=self.processed,
+            failed=self.failed,
+            current_lag=time.perf_counter() - min(self.pending.values()) if self.pending else 0.0,
+            last_lag=self.last_lag,
+            max_lag=self.max_lag,
+            last_duration=self.last_duration,
+        )
+
+
+SENTENCE_WORKER = SentenceWorker()
+
+
+# The standalone worker (cli sentence-worker) finds users with new exercise results by polling user progress.
+# Only it runs this query, so it creates the index it needs on start instead of UserProgress declaring it:
+# deployments running the worker in the API process don't maintain it
+def recent_exercises_query(since: int) -> dict:
+    return {"$or": [{f"languages.{lang}.last_exercise_ts": {"$gte": since}} for lang in settings.LANGUAGES]}
+
+
+async def create_polling_indexes():
+    await UserProgress.get_motor_collection().create_indexes(
+        [IndexModel(f"languages.{lang}.last_exercise_ts") for lang in settings.LANGUAGES]
+    )
+
+
+@get("/worker/stats")
+async def get_worker_stats() -> SentenceWorkerStats:
+    return SENTENCE_WORKER.stats()
+
+
+worker_handlers = [get_worker_stats]
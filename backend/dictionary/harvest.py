@@ -0,0 +1,214 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Callable
+
+from loguru import logger
+from pydantic import BaseModel
+from pymongo import UpdateOne
+
+from backend.dictionary.models import DICTIONARIES, DictionaryVersion, remove_accents
+from backend.dictionary.words import TranslationThrottled, get_translations_online
+
+# (word, source, target) -> translations, blocking: called in a thread
+Translator = Callable[[str, str, str], list[str]]
+
+
+# Word table of the offline stub translator
+OFFLINE_TRANSLATIONS: dict[tuple[str, str], dict[str, list[str]]] = {
+    ("es", "en"): {
+        "agua": ["water"],
+        "amigo": ["friend", "buddy"],
+        "casa": ["house", "home"],
+        "comida": ["food", "meal"],
+        "gracias": ["thanks", "thank you"],
+        "hola": ["hello", "hi"],
+        "hoy": ["today"],
+        "mujer": ["woman", "wife"],
+        "tiempo": ["time", "weather"],
+    },
+}
+
+
+def get_translations_offline(word: str, source: str, target: str) -> list[str]:
+    # Stub translator backend for tests and local runs
+    return list(OFFLINE_TRANSLATIONS.get((source, target), {}).get(word, []))
+
+
+TRANSLATORS: dict[str, Translator] = {
+    "linguee": get_translations_online,
+    "offline": get_translations_offline,
+}
+
+
+class TokenBucket:
+    # Allows bursts of up to capacity calls, rate calls per second on average
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        # No calls for the next seconds (on top of the calls already waiting)
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class HarvestCheckpoint(BaseModel):
+    # Progress of a harvest, saved after every flush so a restarted harvest skips finished words
+    done: set[str] = set()
+    failed: dict[str, str] = {}  # word -> last error, retried on the next run
+
+    @classmethod
+    def load(cls, path: Path | None) -> "HarvestCheckpoint":
+        if path and path.exists():
+            return cls.model_validate_json(path.read_text())
+        return cls()
+
+    def save(self, path: Path | None):
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"done": sorted(self.done), "failed": self.failed}, ensure_ascii=False))
+            tmp.replace(path)
+
+
+class HarvestStats(BaseModel):
+    total: int = 0
+    skipped: int = 0  # already translated (in the checkpoint or in the dictionary)
+    fetched: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+
+class TranslationHarvester:
+    """Fetches translations of many words into DICTIONARIES[source].
+
+    Words are fetched by concurrency workers, limited together to rate fetches per second (bursts of burst),
+    failed fetches are retried with backoff. When the service throttles (429/503), all workers pause for the
+    backoff delay. Results are upserted in bulk every batch_size words and recorded in the checkpoint file.
+    Defaults are conservative: Linguee blocks clients fetching more than a few words a minute.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        target: str = "en",
+        translator: Translator = get_translations_online,
+        rate: float = 1 / 30,
+        burst: int = 1,
+        concurrency: int = 1,
+        batch_size: int = 20,
+        retries: int = 3,
+        retry_delay: float = 60,
+        checkpoint_path: Path | None = None,
+    ):
+        self.source = source
+        self.target = target
+        self.translator = translator
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = HarvestCheckpoint.load(checkpoint_path)
+        self.pending: dict[str, list[str]] = {}
+        self.stats = HarvestStats()
+
+    async def get_translated(self, words: list[str]) -> set[str]:
+        collection = DICTIONARIES[self.source].get_motor_collection()
+        query = {"_id": {"$in": words}, f"translations.{self.target}": {"$exists": True}}
+        return {doc["_id"] async for doc in collection.find(query, {"_id": 1})}
+
+    async def fetch(self, word: str) -> list[str]:
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            await self.bucket.acquire()
+            try:
+                return await loop.run_in_executor(None, self.translator, word, self.source, self.target)
+            except TranslationThrottled as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.retry_delay * 2**attempt
+                logger.warning(f"Translation of {word} throttled ({e}), pausing all fetches for {delay}s")
+                self.bucket.pause(delay)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.retry_delay * 2**attempt
+                logger.warning(f"Translation of {word} failed ({e}), retry {attempt + 1} in {delay}s")
+                await asyncio.sleep(delay)
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        collection = DICTIONARIES[self.source].get_motor_collection()
+        await collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": word},
+                    {"$set": {f"translations.{self.target}": translations, "normalized": remove_accents(word)}},
+                    upsert=True,
+                )
+                for word, translations in batch.items()
+            ],
+            ordered=False,
+        )
+        # Written around BaseDictionary.save, so snapshots are told to reload here
+        await DictionaryVersion.bump(self.source)
+        self.checkpoint.done |= batch.keys()
+        for word in batch:
+            self.checkpoint.failed.pop(word, None)
+        self.checkpoint.save(self.checkpoint_path)
+
+    async def worker(self, queue: asyncio.Queue[str]):
+        while not queue.empty():
+            word = queue.get_nowait()
+            try:
+                translations = await self.fetch(word)
+            except Exception as e:
+                logger.error(f"Translation of {word} failed: {e}")
+                self.checkpoint.failed[word] = str(e)
+                self.stats.failed += 1
+                continue
+            logger.info(f"{word}: {', '.join(translations)}")
+            self.pending[word] = translations
+            self.stats.fetched += 1
+            if len(self.pending) >= self.batch_size:
+                await self.flush()
+
+    async def run(self, words: list[str]) -> HarvestStats:
+        start = time.perf_counter()
+        words = list(dict.fromkeys(words))
+        todo = [word for word in words if word not in self.checkpoint.done]
+        translated = await self.get_translated(todo)
+        todo = [word for word in todo if word not in translated]
+        self.stats = HarvestStats(total=len(words), skipped=len(words) - len(todo))
+        logger.info(f"Harvesting {self.source}->{self.target} translations: {len(todo)} of {len(words)} words")
+
+        queue = asyncio.Queue()
+        for word in todo:
+            queue.put_nowait(word)
+        try:
+            await asyncio.gather(*(self.worker(queue) for _ in range(self.concurrency)))
+        finally:
+            await self.flush()
+            self.checkpoint.save(self.checkpoint_path)
+        self.stats.elapsed = time.perf_counter() - start
+        return self.stats
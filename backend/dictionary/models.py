@@ -1,8 +1,11 @@
 import unicodedata
+from typing import Annotated, ClassVar
 
-from beanie import Document
+from beanie import Document, Indexed
 from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
 
+from backend.dictionary.snapshot import DICTIONARY_SNAPSHOTS
 from backend.settings import settings
 
 DICTIONARIES = {}
@@ -13,14 +16,41 @@ class WordOnlyView(BaseModel):
     normalized: str | None = None
 
 
+class TranslationsView(BaseModel):
+    id: str = Field(alias="_id")
+    translations: dict[str, list[str]] = {}
+
+
+class DictionarySnapshotView(TranslationsView):
+    normalized: str | None = None
+
+
 def remove_accents(text: str):
     normalized_text = unicodedata.normalize("NFKD", text)
     return "".join(char for char in normalized_text if unicodedata.category(char) != "Mn")
 
 
+class DictionaryVersion(Document):
+    # Bumped on every change of a language dictionary, so processes know to reload their snapshots
+    id: str  # language
+    version: int = 0
+
+    class Settings:
+        name = "dictionary_versions"
+
+    @classmethod
+    async def bump(cls, lang: str) -> int:
+        doc = await cls.get_motor_collection().find_one_and_update(
+            {"_id": lang}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+
 class BaseDictionary(Document):
+    lang: ClassVar[str]
+
     id: str
-    normalized: str | None = None
+    normalized: Annotated[str | None, Indexed()] = None
     translations: dict[str, list[str]]  # {"en": ["the", "he"]}
 
     @classmethod
@@ -40,9 +70,13 @@ class BaseDictionary(Document):
     async def save(self, *args, **kwargs):
         self.normalized = remove_accents(self.id)
         await super().save(*args, **kwargs)
+        version = await DictionaryVersion.bump(self.lang)
+        DICTIONARY_SNAPSHOTS.saved(self.lang, self.id, self.normalized, self.translations, version)
 
 
 class EnglishDictionary(BaseDictionary):
+    lang = "en"
+
     class Settings:
         name = "dictionary_en"
 
@@ -53,6 +87,8 @@ DICTIONARIES["en"] = EnglishDictionary
 if "es" in settings.LANGUAGES:
 
     class SpanishDictionary(BaseDictionary):
+        lang = "es"
+
         class Settings:
             name = "dictionary_es"
 
@@ -62,6 +98,8 @@ if "es" in settings.LANGUAGES:
 if "fr" in settings.LANGUAGES:
 
     class FrenchDictionary(BaseDictionary):
+        lang = "fr"
+
         class Settings:
             name = "dictionary_fr"
 
@@ -71,10 +109,12 @@ if "fr" in settings.LANGUAGES:
 if "uk" in settings.LANGUAGES:
 
     class UkrainianDictionary(BaseDictionary):
+        lang = "uk"
+
         class Settings:
             name = "dictionary_ua"
 
     DICTIONARIES["uk"] = UkrainianDictionary
 
 
-words_models = list(DICTIONARIES.values())
+words_models = [*DICTIONARIES.values(), DictionaryVersion]
@@ -0,0 +1,104 @@
+import json
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
+from pydantic import BaseModel
+
+from backend.dictionary.models import remove_accents
+from backend.dictionary.snapshot import DICTIONARY_SNAPSHOTS, DictionarySnapshot
+
+
+class SearchPage(BaseModel):
+    ids: list[str]
+    cursor: str | None = None  # pass to get the next page, None on the last page
+
+
+def fold(text: str) -> str:
+    return remove_accents(text).casefold()
+
+
+def search_keys(id: str, translations: dict[str, list[str]]) -> set[str]:
+    # A word is found by its id and by its translations, whole or by any of their words
+    texts = [id] + [text for values in translations.values() for text in values]
+    return {fold(part) for text in texts for part in [text, *text.split()] if part}
+
+
+class SearchIndex:
+    """Accent-folded prefix index over dictionary word ids and translations: sorted (key, id) pairs and bisect.
+
+    Results are ordered by the first key of each word matching the query, so every word is returned once.
+    """
+
+    def __init__(self, translations: dict[str, dict[str, list[str]]]):
+        self.keys = {id: sorted(search_keys(id, word_translations)) for id, word_translations in translations.items()}
+        self.entries = sorted((key, id) for id, keys in self.keys.items() for key in keys)
+        self.ids = sorted(translations)
+
+    def put(self, id: str, translations: dict[str, list[str]]):
+        # Adds or updates one word: only its own entries are removed and inserted
+        keys = sorted(search_keys(id, translations))
+        old_keys = self.keys.get(id)
+        if old_keys is None:
+            insort(self.ids, id)
+        else:
+            for key in old_keys:
+                del self.entries[bisect_left(self.entries, (key, id))]
+        for key in keys:
+            insort(self.entries, (key, id))
+        self.keys[id] = keys
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def first_match(self, id: str, prefix: str) -> str | None:
+        keys = self.keys[id]
+        i = bisect_left(keys, prefix)
+        return keys[i] if i < len(keys) and keys[i].startswith(prefix) else None
+
+    def search(self, query: str, limit: int = 20, cursor: str | None = None) -> SearchPage:
+        prefix = fold(query.strip())
+        if not prefix:
+            return self.list_ids(limit, cursor)
+
+        start = bisect_left(self.entries, (prefix, ""))
+        if cursor:
+            start = max(start, bisect_right(self.entries, tuple(json.loads(cursor))))
+        ids = []
+        last = None
+        for key, id in islice(self.entries, start, None):
+            if not key.startswith(prefix):
+                break
+            if self.first_match(id, prefix) == key:
+                # A cursor only when there is a next page: more matching entries may all be of words returned
+                if len(ids) >= limit:
+                    return SearchPage(ids=ids, cursor=json.dumps(last))
+                ids.append(id)
+                last = (key, id)
+        return SearchPage(ids=ids)
+
+    def list_ids(self, limit: int, cursor: str | None = None) -> SearchPage:
+        start = bisect_right(self.ids, cursor) if cursor else 0
+        ids = self.ids[start : start + limit]
+        return SearchPage(ids=ids, cursor=ids[-1] if start + limit < len(self.ids) else None)
+
+
+# lang -> (snapshot the index was built from, index)
+SEARCH_INDEXES: dict[str, tuple[DictionarySnapshot, SearchIndex]] = {}
+
+
+async def get_search_index(lang: str) -> SearchIndex:
+    # Built from the dictionary snapshot, again only after the snapshot was reloaded; words saved in between
+    # are updated in the index one by one
+    if not DICTIONARY_SNAPSHOTS.is_loaded(lang):
+        await DICTIONARY_SNAPSHOTS.load_language(lang, (await DICTIONARY_SNAPSHOTS.get_versions()).get(lang, 0))
+    snapshot = DICTIONARY_SNAPSHOTS[lang]
+    cached = SEARCH_INDEXES.get(lang)
+    if cached and cached[0] is snapshot:
+        index = cached[1]
+        for id in snapshot.take_changes("search"):
+            index.put(id, snapshot.translations[id])
+    else:
+        index = SearchIndex(snapshot.translations)
+        snapshot.take_changes("search")
+    SEARCH_INDEXES[lang] = (snapshot, index)
+    return index
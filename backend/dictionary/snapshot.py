@@ -0,0 +1,175 @@
+import asyncio
+from collections import defaultdict
+from contextlib import suppress
+from typing import Iterable
+
+from loguru import logger
+from pymongo.errors import OperationFailure
+
+
+class DictionarySnapshot:
+    """Translations of all words of one language dictionary, kept in memory."""
+
+    def __init__(self):
+        self.translations: dict[str, dict[str, list[str]]] = {}
+        self.normalized: dict[str, str | None] = {}
+        self.by_normalized: dict[str, set[str]] = defaultdict(set)
+        self.version = 0  # DictionaryVersion the snapshot was loaded at
+        self.loaded = False
+        # Ids of words put after loading, for caches built from the snapshot (consumers). Only changes some
+        # consumer hasn't taken yet are kept: changed[0] is change number dropped
+        self.changed: list[str] = []
+        self.dropped = 0  # changes all consumers took, removed from changed
+        self.consumers: dict[str, int] = {}  # consumer -> number of changes taken
+
+    def __len__(self) -> int:
+        return len(self.translations)
+
+    def clear(self):
+        self.translations.clear()
+        self.normalized.clear()
+        self.by_normalized.clear()
+        self.loaded = False
+
+    def put(self, id: str, normalized: str | None, translations: dict[str, list[str]]):
+        old_normalized = self.normalized.get(id)
+        if old_normalized and old_normalized != normalized:
+            self.by_normalized[old_normalized].discard(id)
+            if not self.by_normalized[old_normalized]:
+                del self.by_normalized[old_normalized]
+        if self.loaded and self.consumers:
+            self.changed.append(id)
+        self.translations[id] = {lang: list(values) for lang, values in translations.items()}
+        self.normalized[id] = normalized
+        if normalized:
+            self.by_normalized[normalized].add(id)
+
+    def take_changes(self, consumer: str) -> list[str]:
+        # Ids of words put since the consumer last took changes; the first call only registers the consumer,
+        # built from the snapshot as it is
+        taken = self.consumers.get(consumer, self.dropped + len(self.changed))
+        changes = list(dict.fromkeys(self.changed[taken - self.dropped :]))
+        self.consumers[consumer] = self.dropped + len(self.changed)
+        done = min(self.consumers.values()) - self.dropped
+        del self.changed[:done]
+        self.dropped += done
+        return changes
+
+    def get_translations(self, words: Iterable[str]) -> dict[str, dict[str, list[str]]]:
+        return {word: self.translations[word] for word in words if word in self.translations}
+
+    def find(self, search: str) -> list[str]:
+        # Words matching search as is or without accents
+        found = set(self.by_normalized.get(search, ()))
+        if search in self.translations:
+            found.add(search)
+        return sorted(found)
+
+
+class DictionarySnapshots:
+    """Per-language dictionary snapshots, reloaded when DictionaryVersion of the language changes.
+
+    Versions are watched with a change stream when Mongo supports it (replica set), polled otherwise.
+    Changes saved by this process are applied to the snapshot directly.
+    """
+
+    def __init__(self):
+        self.languages: dict[str, DictionarySnapshot] = defaultdict(DictionarySnapshot)
+        self.task: asyncio.Task | None = None
+        self.reloads = 0
+
+    def __getitem__(self, lang: str) -> DictionarySnapshot:
+        return self.languages[lang]
+
+    def is_loaded(self, lang: str) -> bool:
+        return lang in self.languages and self.languages[lang].loaded
+
+    def clear(self):
+        self.languages.clear()
+
+    async def get_versions(self) -> dict[str, int]:
+        from backend.dictionary.models import DictionaryVersion
+
+        return {doc.id: doc.version for doc in await DictionaryVersion.find_all().to_list()}
+
+    async def load_language(self, lang: str, version: int):
+        from backend.dictionary.models import DICTIONARIES, DictionarySnapshotView
+
+        snapshot = DictionarySnapshot()
+        async for word in DICTIONARIES[lang].find_all().project(DictionarySnapshotView):
+            snapshot.put(word.id, word.normalized, word.translations)
+        snapshot.version = version
+        snapshot.loaded = True
+        self.languages[lang] = snapshot
+        self.reloads += 1
+        logger.info(f"Dictionary snapshot {lang} loaded: {len(snapshot)} words, version {version}")
+
+    async def load(self):
+        from backend.dictionary.models import DICTIONARIES
+
+        # Versions are read first: a change made while loading makes the next refresh load again
+        versions = await self.get_versions()
+        for lang in DICTIONARIES:
+            await self.load_language(lang, versions.get(lang, 0))
+
+    async def refresh(self) -> list[str]:
+        # Reloads outdated snapshots, returns their languages
+        outdated = [
+            (lang, version)
+            for lang, version in (await self.get_versions()).items()
+            if self.is_loaded(lang) and self.languages[lang].version != version
+        ]
+        for lang, version in outdated:
+            await self.load_language(lang, version)
+        return [lang for lang, _ in outdated]
+
+    def saved(self, lang: str, id: str, normalized: str | None, translations: dict[str, list[str]], version: int):
+        # Called after a word was saved and the version bumped to version
+        if not self.is_loaded(lang):
+            return
+        snapshot = self.languages[lang]
+        snapshot.put(id, normalized, translations)
+        if version == snapshot.version + 1:
+            # Otherwise someone else changed the dictionary too, and the next refresh reloads it
+            snapshot.version = version
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self, interval: float):
+        if not self.running:
+            self.task = asyncio.create_task(self.run(interval))
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    async def run(self, interval: float):
+        from backend.dictionary.models import DictionaryVersion
+
+        try:
+            async with DictionaryVersion.get_motor_collection().watch() as stream:
+                logger.info("Watching dictionary versions with a change stream")
+                async for _ in stream:
+                    await self.refresh_safe()
+        except OperationFailure:
+            logger.info(f"Change streams not available, polling dictionary versions every {interval}s")
+        except Exception:
+            logger.exception(f"Dictionary versions change stream failed, polling every {interval}s")
+
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh_safe()
+
+    async def refresh_safe(self):
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Dictionary snapshot refresh failed")
+
+
+DICTIONARY_SNAPSHOTS = DictionarySnapshots()
@@ -1,13 +1,18 @@
 import asyncio
 
 from deep_translator import LingueeTranslator
-from deep_translator.exceptions import ElementNotFoundInGetRequest
+from deep_translator.exceptions import ElementNotFoundInGetRequest, RequestError, TooManyRequests
 from loguru import logger
 
 from backend.dictionary.models import DICTIONARIES
 from backend.settings import settings
 
 
+class TranslationThrottled(Exception):
+    # The translation service refused the request, callers should slow down
+    pass
+
+
 def get_translations_online(word: str, source: str, target: str) -> list[str]:
     try:
         translator = LingueeTranslator(
@@ -16,6 +21,11 @@ def get_translations_online(word: str, source: str, target: str) -> list[str]:
         return translator.translate(word, return_all=True)
     except ElementNotFoundInGetRequest:
         return []
+    except TooManyRequests as e:
+        raise TranslationThrottled("429 Too Many Requests") from e
+    except RequestError as e:
+        # Any other non-2xx status, Linguee answers 503 when it blocks a client
+        raise TranslationThrottled("request refused (503 or other error status)") from e
 
 
 async def get_translations_from_db(word: str, source: str, target: str) -> list[str] | None:
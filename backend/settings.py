@@ -1,5 +1,6 @@
 import json
 from collections import defaultdict
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -20,8 +21,22 @@ class Settings(BaseSettings):
 
     AUTH_SECRET: str = "secret"
 
+    # argon2 defaults are the ones of argon2-cffi's PasswordHasher
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+
     GPT_TOKEN: str = secrets["openai_token"]
     GPT_MODEL: str = "gpt-4.1-mini"
+    GPT_BASE_URL: str | None = None  # any OpenAI-compatible API, default is OpenAI
+    GPT_TIMEOUT: float = 120
+    GPT_MAX_CONCURRENCY: int = 4
+    GPT_MAX_RETRIES: int = 5
+    GPT_RETRY_DELAY: float = 1.0  # doubled on each retry
+    SENTENCE_SOURCE: str = "gpt"  # key in backend.babble.babble.SENTENCE_SOURCES, "offline" works without network
+    GPT_STREAM: bool = False  # store sentences as they are streamed, return as soon as there are enough
 
     SPACY_MODELS: dict[str, str] = {
         "en": "en_core_web_sm",
@@ -29,6 +44,26 @@ class Settings(BaseSettings):
         # "fr": "fr_core_news_sm",
         # "uk": "uk_core_news_sm",
     }
+    # Lemmatization only needs tok2vec, tagger/morphologizer, attribute_ruler and lemmatizer
+    SPACY_EXCLUDE: list[str] = ["parser", "ner", "senter"]
+    SPACY_BATCH_SIZE: int = 256
+    SPACY_N_PROCESS: int = 1
+    LEMMA_CACHE_SIZE: int = 100_000
+    LEMMA_CACHE_PATH: str | None = None  # e.g. "lemmas.sqlite" to keep cached lemmas between restarts
+
+    # Serve sentence lookups from in-memory lemma index instead of scanning babble collection
+    USE_SENTENCE_INDEX: bool = True
+    SENTENCE_INDEX_REFRESH_INTERVAL: float = 5.0  # seconds between checks for sentences changed by other processes
+    # How many generation calls for words short of sentences run at once when fetching sentences for several words
+    SENTENCE_GENERATION_CONCURRENCY: int = 2
+    # Serve translations from in-memory dictionary snapshots, reloaded when a dictionary version changes
+    USE_DICTIONARY_SNAPSHOT: bool = True
+    DICTIONARY_REFRESH_INTERVAL: float = 5.0  # seconds between version checks when change streams are not available
+    # Pre-generate sentences for the next lessons in background after each exercise result
+    SENTENCE_WORKER: bool = False
+    SENTENCE_BUFFER_LESSONS: int = 2
+    # How words to practice are picked, "least_seen" or "spaced_repetition" (backend.courses.models.PRACTICE_STRATEGIES)
+    PRACTICE_STRATEGY: str = "least_seen"
 
     LANGUAGES: dict[str, str] = {
         "en": "English",
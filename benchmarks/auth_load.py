@@ -0,0 +1,78 @@
+"""Run concurrent logins alongside exercise requests against a running API and report tail latencies.
+
+make devrun
+python -m benchmarks.auth_load --email test@test.me --password asdf --duration 20
+"""
+
+import asyncio
+import statistics
+import time
+
+import httpx
+import typer
+
+
+def percentiles(latencies: list[float]) -> str:
+    if not latencies:
+        return "no requests"
+    latencies = sorted(latencies)
+    p = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return (
+        f"n={len(latencies):5} p50={p[49] * 1000:8.1f}ms p95={p[94] * 1000:8.1f}ms "
+        f"p99={p[98] * 1000:8.1f}ms max={latencies[-1] * 1000:8.1f}ms"
+    )
+
+
+async def worker(client: httpx.AsyncClient, request, deadline: float, latencies: list[float], errors: list[int]):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await request(client)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+
+
+async def run(url: str, email: str, password: str, path: str, duration: float, logins: int, readers: int):
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        response = await client.post("/login", json={"email": email, "password": password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+        response = await client.get("/me", headers=headers)
+        user_id = response.json()["id"]
+        path = path.format(user_id=user_id)
+
+        async def login(client):
+            return await client.post("/login", json={"email": email, "password": password})
+
+        async def read(client):
+            return await client.get(path, headers=headers)
+
+        async def me(client):
+            return await client.get("/me", headers=headers)
+
+        results = {name: ([], []) for name in ["login", path, "/me"]}
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(worker(client, login, deadline, *results["login"]) for _ in range(logins)),
+            *(worker(client, read, deadline, *results[path]) for _ in range(readers)),
+            *(worker(client, me, deadline, *results["/me"]) for _ in range(readers)),
+        )
+
+    for name, (latencies, errors) in results.items():
+        print(f"{name:40} {percentiles(latencies)} errors={len(errors)}")
+
+
+def main(
+    email: str,
+    password: str,
+    url: str = "http://localhost:8000",
+    path: str = "/user/{user_id}/exercises?lang=es",
+    duration: float = 20,
+    logins: int = 8,
+    readers: int = 8,
+):
+    asyncio.run(run(url, email, password, path, duration, logins, readers))
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,82 @@
+"""Compare bytes sent to Mongo per /exercise/result submission: whole-document save() vs partial update.
+
+With a replica set (oplog available) sizes of the resulting oplog entries are reported too.
+python -m benchmarks.exercise_writes [--words 3000] [--exercises 8]
+"""
+
+import asyncio
+import random
+import time
+from uuid import uuid4
+
+import bson
+import typer
+from beanie.odm.utils.encoder import Encoder
+
+from backend.app_ctx import AppCtx
+from backend.courses.courses import get_course_words
+from backend.courses.models import LanguageData, UserProgress, WordData
+from backend.courses.updates import exercise_results_update, version_filter
+from backend.settings import settings
+
+
+def make_user_progress(lang: str, course: str, words: int) -> UserProgress:
+    course_words = get_course_words(lang, course)[:words]
+    lang_data = LanguageData(
+        courses=[course],
+        words={
+            word: WordData(seen_times=random.randint(1, 50), last_seen_ts=int(time.time())) for word in course_words
+        },
+    )
+    lang_data._lang = lang
+    lang_data.get_course_stats(course)
+    return UserProgress(id=uuid4(), languages={lang: lang_data})
+
+
+async def last_oplog_size(namespace: str) -> int | None:
+    oplog = AppCtx.mongo_client["local"]["oplog.rs"]
+    try:
+        entry = await oplog.find({"ns": namespace}).sort("$natural", -1).limit(1).to_list(1)
+    except Exception:
+        return None
+    return len(bson.encode(entry[0])) if entry else None
+
+
+async def run(lang: str, course: str, words: int, exercises: int, words_per_exercise: int):
+    await AppCtx.start()
+    try:
+        user_progress = make_user_progress(lang, course, words)
+        await user_progress.insert()
+        namespace = f"{settings.MONGO_DB}.{UserProgress.get_collection_name()}"
+        known = list(user_progress.languages[lang].words)
+        results = [(uuid4(), random.sample(known, words_per_exercise), random.random() > 0.2) for _ in range(exercises)]
+
+        lang_data = user_progress.languages[lang].model_copy(deep=True)
+        version = lang_data.total_exercises
+        update = exercise_results_update(lang, lang_data, results)
+        query = version_filter(user_progress.id, lang, version)
+        sent = bson.encode({"q": query, "u": update})
+
+        await UserProgress.get_motor_collection().update_one(query, update)
+        update_oplog = await last_oplog_size(namespace)
+
+        for id, words_, correct in results:
+            user_progress.languages[lang].add_exercise(id=id, words=words_, correct=correct)
+        document = bson.encode(Encoder().encode(user_progress))
+        await user_progress.save()
+        save_oplog = await last_oplog_size(namespace)
+
+        print(f"{words} words, {exercises} exercises x {words_per_exercise} words")
+        print(f"save():          {len(document):9} bytes sent, oplog entry {save_oplog or 'n/a'}")
+        print(f"update:          {len(sent):9} bytes sent, oplog entry {update_oplog or 'n/a'}")
+        await user_progress.delete()
+    finally:
+        await AppCtx.shutdown()
+
+
+def main(lang: str = "es", course: str = "casa", words: int = 3000, exercises: int = 8, words_per_exercise: int = 5):
+    asyncio.run(run(lang, course, words, exercises, words_per_exercise))
+
+
+if __name__ == "__main__":
+    typer.run(main)
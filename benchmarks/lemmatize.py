@@ -0,0 +1,51 @@
+"""Compare single-pass and two-pass lemmatization: output equality and sentences/second.
+
+python -m benchmarks.lemmatize [--filename to_check_tokenizator.txt] [--repeat 20]
+"""
+
+import time
+
+import typer
+
+from backend.babble.lemmas import lemmatize
+
+SENTENCES = {
+    "es": [
+        "¡Hola, amigo!",
+        "Sí, puedo hacerlo.",
+        "Señorita Parker",
+        "¿Tú vas a ir bien?",
+        "Gracias por tu ayuda.",
+        "Me siento bien hoy.",
+        "Necesito agua.",
+    ],
+    "en": ["Yes, I am going.", "Hello, my friend!", "Thank you for your help."],
+}
+
+
+def run(lang: str, sentences: list[str], repeat: int, two_pass: bool) -> tuple[list[list[str]], float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = [lemmatize(lang, sentence, two_pass=two_pass, use_cache=False) for sentence in sentences]
+    return result, len(sentences) * repeat / (time.perf_counter() - start)
+
+
+def main(filename: str = "to_check_tokenizator.txt", lang: str = "es", repeat: int = 20):
+    sentences = list(SENTENCES.get(lang, []))
+    with open(filename, "r") as f:
+        sentences += [line.strip() for line in f if line.strip()]
+
+    before, before_rate = run(lang, sentences, repeat, two_pass=True)
+    after, after_rate = run(lang, sentences, repeat, two_pass=False)
+
+    for sentence, a, b in zip(sentences, before, after):
+        if a != b:
+            print(f"MISMATCH {sentence!r}: two-pass={a} single-pass={b}")
+
+    print(f"{len(sentences)} sentences x {repeat}, same output: {before == after}")
+    print(f"two-pass:    {before_rate:10.1f} sentences/s")
+    print(f"single-pass: {after_rate:10.1f} sentences/s ({after_rate / before_rate:.2f}x)")
+
+
+if __name__ == "__main__":
+    typer.run(main)
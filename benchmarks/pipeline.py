@@ -0,0 +1,142 @@
+"""Drive sentence generation and the exercise endpoints end-to-end with the offline sentence source.
+
+Needs a local Mongo (docker compose up -d), uses a separate database which is emptied first.
+python -m benchmarks.pipeline [--mongo-db tower_bench] [--calls 50] [--users 4] [--lessons 5]
+"""
+
+import asyncio
+import time
+from uuid import UUID
+
+import typer
+from httpx import AsyncClient
+
+from backend.api_app import app
+from backend.app_ctx import AppCtx
+from backend.babble.babble import generate_and_save_sentences, get_sentences, pass_counts
+from backend.babble.index import SENTENCE_INDEX
+from backend.babble.models import BabbleSentence
+from backend.core.models import User
+from backend.courses.courses import get_base_words, get_course_words
+from backend.courses.models import UserProgress
+from backend.settings import settings
+from benchmarks.auth_load import percentiles
+
+BENCH_PASSWORD = "bench"
+
+
+def report(name: str, count: int, elapsed: float, unit: str = "calls"):
+    print(f"{name:40} {count:6} {unit} in {elapsed:8.3f}s, {count / elapsed:10.1f} {unit}/s")
+
+
+async def generation(lang: str, dictionary: list[str], words: list[str], calls: int):
+    start = time.perf_counter()
+    generated = 0
+    for i in range(calls):
+        generated += len(await generate_and_save_sentences(dictionary, [words[i % len(words)]], lang, N=10))
+    report("generate_and_save_sentences", generated, time.perf_counter() - start, "sentences")
+
+    pass_counts["get_sentences"].clear()
+    start = time.perf_counter()
+    for i in range(calls):
+        await get_sentences(dictionary + words[:i], [words[i % len(words)]], lang, N=5)
+    report("get_sentences", calls, time.perf_counter() - start)
+    print(f"{'get_sentences passes':40} {dict(sorted(pass_counts['get_sentences'].items()))}")
+
+
+async def login(client: AsyncClient, email: str, password: str) -> dict[str, str]:
+    response = await client.post("/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+async def student(
+    client: AsyncClient, headers: dict, user_id: UUID, lang: str, course: str, lessons: int, latencies: dict
+):
+    async def call(name: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, path, headers=headers, **kwargs)
+        latencies[name].append(time.perf_counter() - start)
+        response.raise_for_status()
+        return response.json()
+
+    for _ in range(lessons):
+        for path in (
+            f"/user/{user_id}/exercises/new_words?lang={lang}&course={course}",
+            f"/user/{user_id}/exercises?lang={lang}",
+        ):
+            name = path.split("?")[0].replace(str(user_id), "{user_id}")
+            exercises = await call(name, "GET", path)
+            results = {exercise["sentence"]["id"]: True for exercise in exercises if exercise["sentence"]}
+            if results:
+                await call(
+                    "/exercise/result",
+                    "POST",
+                    "/exercise/result",
+                    json={"user_id": str(user_id), "lang": lang, "results": results},
+                )
+
+
+async def endpoints(lang: str, course: str, users: int, lessons: int):
+    user_ids = []
+    for i in range(users):
+        user = await User.create_user(email=f"bench{i}@test.me", nickname=f"bench{i}", password=BENCH_PASSWORD)
+        user_progress = await UserProgress.get(user.id)
+        user_progress.get_new_words(lang, course)
+        user_progress.languages[lang].courses = [course]
+        await user_progress.save()
+        user_ids.append(user.id)
+
+    pass_counts["get_sentences_for_words"].clear()
+    latencies = {
+        name: [] for name in ["/user/{user_id}/exercises/new_words", "/user/{user_id}/exercises", "/exercise/result"]
+    }
+    async with AsyncClient(app=app, base_url="http://bench", timeout=600) as client:
+        # Logged in before timing, only the exercise endpoints are measured
+        headers = [await login(client, f"bench{i}@test.me", BENCH_PASSWORD) for i in range(users)]
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                student(client, user_headers, user_id, lang, course, lessons, latencies)
+                for user_headers, user_id in zip(headers, user_ids)
+            )
+        )
+    report("exercise endpoints", sum(map(len, latencies.values())), time.perf_counter() - start, "requests")
+    for name, values in latencies.items():
+        print(f"{name:40} {percentiles(values)}")
+    print(f"{'get_sentences_for_words passes':40} {dict(sorted(pass_counts['get_sentences_for_words'].items()))}")
+
+
+async def run(mongo_url: str, mongo_db: str, lang: str, course: str, calls: int, users: int, lessons: int):
+    settings.MONGO_URL = mongo_url or settings.MONGO_URL
+    settings.MONGO_DB = mongo_db
+    settings.SENTENCE_SOURCE = "offline"
+
+    await AppCtx.start()
+    try:
+        for model in (BabbleSentence, User, UserProgress):
+            await model.find_all().delete()
+        SENTENCE_INDEX.clear()
+
+        dictionary = get_base_words(lang)
+        words = [word for word in get_course_words(lang, course) if word not in dictionary][:calls]
+        await generation(lang, dictionary, words, calls)
+        await endpoints(lang, course, users, lessons)
+    finally:
+        await AppCtx.shutdown()
+
+
+def main(
+    mongo_url: str = "",
+    mongo_db: str = "tower_bench",
+    lang: str = "es",
+    course: str = "casa",
+    calls: int = 50,
+    users: int = 4,
+    lessons: int = 5,
+):
+    asyncio.run(run(mongo_url, mongo_db, lang, course, calls, users, lessons))
+
+
+if __name__ == "__main__":
+    typer.run(main)
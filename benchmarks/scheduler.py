@@ -0,0 +1,85 @@
+"""Replay synthetic exercise histories to compare the cost of practice word selection strategies.
+
+No database needed: LanguageData is driven directly with a simulated clock. Like in the API, every lesson starts
+from freshly loaded LanguageData (validated from its stored form), so nothing is kept between lessons.
+python -m benchmarks.scheduler [--sizes 100,1000,5000] [--days 30] [--lessons-per-day 3]
+"""
+
+import random
+import time
+from uuid import uuid4
+
+import typer
+
+from backend.courses.models import (
+    EXERCISES_PER_LESSON,
+    PRACTICE_STRATEGIES,
+    WORDS_TO_PRACTICE_PER_LESSON,
+    LanguageData,
+    WordData,
+)
+from backend.courses.scheduler import DAY
+
+START_TS = 1_700_000_000
+
+
+def make_language_data(size: int, rng: random.Random) -> LanguageData:
+    words = {}
+    for i in range(size):
+        last_seen_ts = START_TS - rng.randint(0, 60 * DAY)
+        interval = rng.choice([0, DAY, 6 * DAY, 15 * DAY, 40 * DAY])
+        words[f"w{i}"] = WordData(
+            seen_times=rng.randint(1, 30),
+            first_seen_ts=last_seen_ts - rng.randint(0, 60 * DAY),
+            last_seen_ts=last_seen_ts,
+            interval=interval,
+            due_ts=last_seen_ts + interval,
+        )
+    return LanguageData(words=words)
+
+
+def simulate(lang_data: LanguageData, strategy: str, days: int, lessons_per_day: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    select = PRACTICE_STRATEGIES[strategy]
+    vocabulary = list(lang_data.words)
+    stats = {"load": 0.0, "select": 0.0, "add_exercise": 0.0, "overdue": 0}
+
+    stored = lang_data.model_dump(by_alias=True)
+    for lesson in range(days * lessons_per_day):
+        ts = START_TS + lesson * DAY // lessons_per_day
+        start = time.perf_counter()
+        lang_data = LanguageData.model_validate(stored)
+        stats["load"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        words = list(select(lang_data, WORDS_TO_PRACTICE_PER_LESSON))
+        stats["select"] += time.perf_counter() - start
+        stats["overdue"] += sum(lang_data.words[word].due_ts <= ts for word in words)
+
+        start = time.perf_counter()
+        for i in range(EXERCISES_PER_LESSON):
+            sentence = [words[i % len(words)]] + rng.sample(vocabulary, 3)
+            # Words reviewed in time are recalled more often
+            correct = rng.random() < (0.9 if lang_data.words[sentence[0]].due_ts + DAY >= ts else 0.6)
+            lang_data.add_exercise(id=uuid4(), words=sentence, correct=correct, ts=ts)
+        stats["add_exercise"] += time.perf_counter() - start
+        stored = lang_data.model_dump(by_alias=True)
+    return stats
+
+
+def main(sizes: str = "100,1000,5000", days: int = 30, lessons_per_day: int = 3, seed: int = 0):
+    lessons = days * lessons_per_day
+    for size in map(int, sizes.split(",")):
+        lang_data = make_language_data(size, random.Random(seed))
+        for strategy in PRACTICE_STRATEGIES:
+            stats = simulate(lang_data, strategy, days, lessons_per_day, seed)
+            print(
+                f"{size:6} words {strategy:18} load {stats['load'] / lessons * 1000:8.3f} ms/lesson, "
+                f"select {stats['select'] / lessons * 1000:8.3f} ms/lesson, "
+                f"add_exercise {stats['add_exercise'] / lessons * 1000:8.3f} ms/lesson, "
+                f"due words practiced {stats['overdue'] / (lessons * WORDS_TO_PRACTICE_PER_LESSON):6.1%}"
+            )
+
+
+if __name__ == "__main__":
+    typer.run(main)
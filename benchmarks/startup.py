@@ -0,0 +1,41 @@
+"""Measure import time and RSS of backend modules, and the cost of the first lemmatization per language.
+
+python -m benchmarks.startup
+"""
+
+import subprocess
+import sys
+
+import typer
+
+SCRIPT = """
+import resource, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"import {module}: {{imported:.3f}}s, max RSS {{rss:.1f}} MiB")
+if {lemmatize}:
+    from backend.babble.lemmas import lemmatize
+    from backend.settings import settings
+    for lang in settings.SPACY_MODELS:
+        start = time.perf_counter()
+        lemmatize(lang, "Hola")
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"first lemmatize({{lang}}): {{time.perf_counter() - start:.3f}}s, max RSS {{rss:.1f}} MiB")
+"""
+
+
+def main():
+    # Each measurement runs in a fresh interpreter so nothing is preloaded
+    for module, lemmatize in [
+        ("backend.babble.models", False),
+        ("backend.api_app", False),
+        ("backend.babble.models", True),
+    ]:
+        code = SCRIPT.format(module=module, lemmatize=lemmatize)
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -2,6 +2,7 @@ import asyncio
 import json
 from collections import Counter
 from functools import wraps
+from pathlib import Path
 
 import typer
 from bs4 import BeautifulSoup
@@ -9,7 +10,6 @@ from loguru import logger
 
 from backend.app_ctx import get_application_ctx
 from backend.core.models import User
-from backend.dictionary.words import generate_and_save_translations, get_translations_from_db
 
 app = typer.Typer()
 
@@ -42,18 +42,76 @@ def process_srt(filename: str):
 
 
 @app.command()
-def process_words(filename: str, lang: str = "es"):
-    from backend.babble.babble import lemmatize
+def process_words(filename: str, lang: str = "es", batch_size: int = 1000, n_process: int = 1):
+    from backend.babble.lemmas import lemmatize_many
 
-    lemmatized = []
     with open(filename, "r") as f:
-        for line in f:
-            lemmatized += lemmatize(lang, line, skip_propns=True)
+        lines = f.readlines()
+
+    lemmatized = []
+    for lemmas in lemmatize_many(lang, lines, skip_propns=True, batch_size=batch_size, n_process=n_process):
+        lemmatized += lemmas
 
     counts = Counter(lemmatized)
     print(json.dumps(dict(counts.most_common()), indent=4))
 
 
+@app.command()
+@coro
+async def relemmatize_sentences(batch_size: int = 1000):
+    from backend.babble.models import BabbleSentence
+
+    async with get_application_ctx():
+        total = updated = duplicates = 0
+        batch = []
+        async for sentence in BabbleSentence.find_all():
+            batch.append(sentence)
+            if len(batch) >= batch_size:
+                batch_updated, batch_duplicates = await relemmatize_batch(batch)
+                updated += batch_updated
+                duplicates += batch_duplicates
+                total += len(batch)
+                batch = []
+        if batch:
+            batch_updated, batch_duplicates = await relemmatize_batch(batch)
+            updated += batch_updated
+            duplicates += batch_duplicates
+            total += len(batch)
+
+    logger.info(f"Re-lemmatized {total} sentences, {updated} changed, {duplicates} duplicates deleted")
+
+
+async def relemmatize_batch(sentences: list) -> tuple[int, int]:
+    # Returns the numbers of changed sentences and of deleted duplicates: saving recomputes the content hash
+    from backend.babble.models import BabbleSentence
+
+    old_lemmas = [sentence.lemmas for sentence in sentences]
+    BabbleSentence.update_lemmas_many(sentences)
+    changed = [sentence for sentence, lemmas in zip(sentences, old_lemmas) if sentence.lemmas != lemmas]
+    duplicates = 0
+    for sentence in changed:
+        if not await sentence.save_unique():
+            duplicates += 1
+    return len(changed) - duplicates, duplicates
+
+
+@app.command()
+@coro
+async def backfill_content_hash(delete_duplicates: bool = False):
+    from backend.babble.models import BabbleSentence
+
+    async with get_application_ctx():
+        total = duplicates = 0
+        async for sentence in BabbleSentence.find({"content_hash": {"$not": {"$type": "string"}}}):
+            if await sentence.save_unique(delete_duplicate=delete_duplicates):
+                total += 1
+            else:
+                duplicates += 1
+
+    action = "deleted" if delete_duplicates else "found"
+    logger.info(f"Content hash set for {total} sentences, {duplicates} duplicates {action}")
+
+
 @app.command()
 @coro
 async def generate_base_sentences(lang: str = "es"):
@@ -107,28 +165,110 @@ async def generate_course_sentences(course: str, lang: str = "es", limit: int =
 
 @app.command()
 @coro
-async def get_translations(course: str, lang: str = "es", limit: int = 1000):
+async def get_translations(
+    course: str,
+    lang: str = "es",
+    limit: int = 1000,
+    translator: str = "linguee",
+    rate: float = 1 / 30,
+    burst: int = 1,
+    concurrency: int = 1,
+    batch_size: int = 20,
+    checkpoint: str = "",
+):
+    # Resumable: progress is kept in the checkpoint file (.checkpoints/translations_<lang>_<course>.json by default)
+    from backend.dictionary.harvest import TRANSLATORS, TranslationHarvester
+
     with open(f"{lang}/{course}.json", "r") as f:
         course_data = json.load(f)
 
     course_words = list(course_data.keys())[:limit]
 
-    logger.info(f"Generating translations for {lang}: {len(course_words)} course words")
+    async with get_application_ctx():
+        harvester = TranslationHarvester(
+            lang,
+            "en",
+            translator=TRANSLATORS[translator],
+            rate=rate,
+            burst=burst,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            checkpoint_path=Path(checkpoint or f".checkpoints/translations_{lang}_{course}.json"),
+        )
+        stats = await harvester.run(course_words)
+
+    logger.info(
+        f"{stats.fetched} words translated, {stats.skipped} already translated, {stats.failed} failed "
+        f"in {stats.elapsed:.1f}s"
+    )
+
+
+@app.command()
+@coro
+async def sentence_worker(poll_interval: float = 10):
+    # Standalone pre-generation worker: picks up users with new exercise results by polling user progress.
+    # Sentences it stores bump SentencesVersion, so API processes update their sentence index within
+    # SENTENCE_INDEX_REFRESH_INTERVAL
+    import time
+
+    from backend.courses.models import UserProgress
+    from backend.courses.worker import SENTENCE_WORKER, create_polling_indexes, recent_exercises_query
+
+    async with get_application_ctx():
+        await create_polling_indexes()
+        SENTENCE_WORKER.start()
+        since = int(time.time())
+        while True:
+            now = int(time.time())
+            query = recent_exercises_query(since)
+            async for user_progress in UserProgress.find(query):
+                for lang, lang_data in user_progress.languages.items():
+                    if lang_data.last_exercise_ts >= since:
+                        SENTENCE_WORKER.enqueue(user_progress.id, lang)
+            stats = SENTENCE_WORKER.stats()
+            logger.info(
+                f"Sentence worker: queue depth {stats.queue_depth}, processed {stats.processed}, "
+                f"failed {stats.failed}, last lag {stats.last_lag:.3f}s"
+            )
+            since = now
+            await asyncio.sleep(poll_interval)
+
+
+@app.command()
+@coro
+async def backfill_course_stats():
+    from backend.courses.models import UserProgress
+    from backend.courses.updates import save_language_fields
+
+    async with get_application_ctx():
+        total = 0
+        async for user_progress in UserProgress.find_all():
+            for lang, lang_data in user_progress.languages.items():
+                rebuilt = False
+                for course in lang_data.courses:
+                    try:
+                        lang_data.rebuild_course_stats(course)
+                    except FileNotFoundError:
+                        logger.warning(f"User {user_progress.id}: course {lang}/{course} not found, skipping")
+                        continue
+                    rebuilt = True
+                # Written whole, as course names may contain dots
+                if rebuilt and not await save_language_fields(user_progress.id, lang, lang_data, ["course_stats"]):
+                    logger.warning(f"User {user_progress.id}: {lang} changed while rebuilding, skipping")
+                total += rebuilt
+
+    logger.info(f"Course stats rebuilt for {total} user languages")
+
+
+@app.command()
+@coro
+async def ensure_indexes(drop: bool = False):
+    from backend.app_ctx import document_models
+    from backend.core import indexes
 
     async with get_application_ctx():
-        for i, word in enumerate(course_words):
-            from_api = False
-            translations = await get_translations_from_db(word, lang, "en")
-            while translations is None:
-                from_api = True
-                try:
-                    translations = await generate_and_save_translations(word, lang, "en")
-                except Exception as e:
-                    logger.warning(f"Error: {e}")
-                    await asyncio.sleep(60)
-            logger.info(f"{i: 3}. {word}: {', '.join(translations)}")
-            if from_api:
-                await asyncio.sleep(1800)
+        for report in await indexes.ensure_indexes(document_models, drop=drop):
+            logger.info(f"{report.collection}: created {report.created}, dropped {report.dropped}")
 
 
 @app.command()
@@ -7,7 +7,7 @@ from textual.widgets import Button, Footer, Header, Static
 from backend.app_ctx import AppCtx
 from backend.babble.models import BabbleSentence
 from backend.core.models import User
-from backend.courses.courses import get_course_data, get_courses_list
+from backend.courses.courses import COURSES, get_courses_list
 from backend.courses.models import UserProgress
 
 USER_ID = "ff2caa0f-2426-4ad4-b9fe-b1e01f0f0e2a"
@@ -39,12 +39,13 @@ def get_stats_text() -> str:
     if course_data is None:
         return "Waiting for Data"
     data = course_data.languages[lang]
-    c_data = get_course_data(lang, "casa")
+    course = COURSES.get_course(lang, "casa")
+    c_data = course.frequency
     encountered = len(data.words)
     learned = len([word for word in data.words if word in c_data])
     practiced = len([word for word in data.words if word in c_data and data.words[word].seen_times > 1])
     count = len(c_data)
-    total = sum([cnt for word, cnt in c_data.items()])
+    total = course.total_frequency
     total_learned = sum([cnt for word, cnt in c_data.items() if word in data.words])
 
     new_words = len(data.get_new_words())
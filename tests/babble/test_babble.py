@@ -1,6 +1,9 @@
+import asyncio
 from unittest.mock import AsyncMock
+from uuid import uuid4
 
 import pytest
+from bson import Binary
 
 from backend.babble.babble import (
     BabbleSentence,
@@ -8,8 +11,15 @@ from backend.babble.babble import (
     generate_and_save_sentences,
     generate_babble,
     get_from_db,
+    get_from_db_by_words,
     get_sentences,
+    get_sentences_for_words,
+    streaming_tasks,
 )
+from backend.babble.index import SENTENCE_INDEX
+from backend.babble.streaming import ArrayObjectsParser
+from backend.settings import settings
+from cli import relemmatize_batch
 
 DICTIONARY = [
     "agua",
@@ -120,3 +130,136 @@ async def test_skip_duplicates(generated_output_with_lemmas):
 
     result = await generate_and_save_sentences(DICTIONARY)
     assert len(result) == 4
+
+
+async def test_relemmatize_normalized_duplicates():
+    # Stored with content hashes of an older normalization: different hashes, same content
+    await BabbleSentence.get_motor_collection().insert_many(
+        [
+            {
+                "_id": Binary.from_uuid(uuid4()),
+                "text": text,
+                "lemmas": {"es": ["hola", "amigo"]},
+                "content_hash": content_hash,
+            }
+            for text, content_hash in [
+                ({"en": "Hello, my friend!", "es": "¡Hola, amigo!"}, "old-1"),
+                ({"en": "hello my friend", "es": "Hola amigo"}, "old-2"),
+            ]
+        ]
+    )
+
+    assert await relemmatize_batch(await BabbleSentence.find_all().to_list()) == (1, 1)
+    assert await BabbleSentence.count() == 1
+
+
+async def test_skip_normalized_duplicates():
+    await BabbleSentence(text={"en": "hello my friend", "es": "Hola amigo"}).insert()
+    inserted = await BabbleSentence.insert_new(
+        [
+            BabbleSentence(text={"en": "Hello, my friend!", "es": "¡Hola, amigo!"}),
+            BabbleSentence(text={"en": "I need water.", "es": "Necesito agua."}),
+            BabbleSentence(text={"en": "I need water!", "es": "¡Necesito agua!"}),
+        ]
+    )
+    assert [sentence.text["es"] for sentence in inserted] == ["Necesito agua."]
+    assert await BabbleSentence.count() == 2
+    assert len(SENTENCE_INDEX["es"]) == 2
+
+
+async def test_concurrent_generation_no_duplicates():
+    results = await asyncio.gather(*(generate_and_save_sentences(DICTIONARY) for _ in range(4)))
+    assert sum(len(result) for result in results) == 5
+    assert await BabbleSentence.count() == 5
+
+
+@pytest.mark.asyncio
+async def test_get_sentences_for_words():
+    dictionary = [word for word in DICTIONARY if word not in ("agua", "ayuda")]
+    result = await get_sentences_for_words(dictionary, ["agua", "ayuda"], N=1)
+
+    assert [sentence.text["es"] for sentence in result["agua"]] == ["Necesito agua."]
+    assert [sentence.text["es"] for sentence in result["ayuda"]] == ["Gracias por tu ayuda."]
+    # Both words were short on the first pass and got one shared generation call
+    assert GPTSentences.generate_senteces.call_count == 1
+    assert GPTSentences.generate_senteces.call_args.kwargs["req_dictionary"] == ["agua", "ayuda"]
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+async def test_get_from_db_by_words(generated_output_with_lemmas, monkeypatch, use_index):
+    monkeypatch.setattr(SENTENCE_INDEX, "loaded", use_index)
+    await BabbleSentence.insert_many(generated_output_with_lemmas)
+
+    result = await get_from_db_by_words(
+        dictionary=["gracias", "por", "tu", "yo", "sentir", "bien"], words=["ayuda", "hoy", "agua"]
+    )
+    assert_same_sentences(result["ayuda"], [generated_output_with_lemmas[1]])
+    assert_same_sentences(result["hoy"], [generated_output_with_lemmas[3]])
+    assert result["agua"] == []
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+async def test_get_from_db_by_words_shared_sentence(generated_output_with_lemmas, monkeypatch, use_index):
+    monkeypatch.setattr(SENTENCE_INDEX, "loaded", use_index)
+    both = BabbleSentence(
+        text={"en": "I need water today.", "es": "Necesito agua hoy."}, lemmas={"es": ["necesitar", "agua", "hoy"]}
+    )
+    await BabbleSentence.insert_many([*generated_output_with_lemmas, both])
+
+    # Practice words, known already
+    words = ["hoy", "agua", "necesitar"]
+    result = await get_from_db_by_words(
+        dictionary=["gracias", "por", "tu", "yo", "sentir", "bien", *words], words=words
+    )
+    # Fits several of the words: given to the one that had no sentence yet
+    assert_same_sentences(result["hoy"], [generated_output_with_lemmas[3]])
+    assert_same_sentences(result["agua"], [generated_output_with_lemmas[4]])
+    assert_same_sentences(result["necesitar"], [both])
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+async def test_get_from_db_by_words_two_new_words(generated_output_with_lemmas, monkeypatch, use_index):
+    monkeypatch.setattr(SENTENCE_INDEX, "loaded", use_index)
+    await BabbleSentence.insert_many(generated_output_with_lemmas)
+
+    # "Necesito agua." has two new words: the student would see one of them unlearned with either
+    result = await get_from_db_by_words(
+        dictionary=["gracias", "por", "tu", "yo", "sentir", "bien"], words=["hoy", "agua", "necesitar"]
+    )
+    assert_same_sentences(result["hoy"], [generated_output_with_lemmas[3]])
+    assert result["agua"] == []
+    assert result["necesitar"] == []
+
+
+def test_array_objects_parser():
+    content = (
+        '```json\n{"sentences": [{"en": "Hi, [friend]", "es": "Hola, \\"amigo\\""}, {"en": "Yes", "es": "Sí"}]}\n```'
+    )
+    parser = ArrayObjectsParser()
+    result = []
+    for i in range(0, len(content), 7):
+        result.extend(parser.feed(content[i : i + 7]))
+    assert result == [{"en": "Hi, [friend]", "es": 'Hola, "amigo"'}, {"en": "Yes", "es": "Sí"}]
+    assert parser.errors == 0
+
+
+async def test_get_sentences_streaming(mocker, monkeypatch):
+    monkeypatch.setattr(settings, "GPT_STREAM", True)
+    finish = asyncio.Event()
+
+    async def stream_senteces(self, **kwargs):
+        yield {"en": "Hello, my friend!", "es": "¡Hola, amigo!"}
+        yield {"en": "I need water.", "es": "Necesito agua."}
+        yield {"en": "I feel good today.", "es": "Me siento bien hoy."}
+        await finish.wait()
+        yield {"en": "Thank you for your help.", "es": "Gracias por tu ayuda."}
+
+    mocker.patch.object(GPTSentences, "stream_senteces", stream_senteces)
+
+    # Returns before the stream is over
+    sentences = await get_sentences(DICTIONARY, N=2)
+    assert [s.text["es"] for s in sentences] == ["¡Hola, amigo!", "Necesito agua."]
+
+    finish.set()
+    await asyncio.gather(*streaming_tasks)
+    assert await BabbleSentence.count() == 4
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import socket
+import time
+
+import pytest_asyncio
+import uvicorn
+from litestar import Litestar, Response, post
+
+from backend.babble.babble import GPTSentences
+from backend.babble.gpt import GPTClient
+from backend.settings import settings
+
+
+class StubOpenAI:
+    # Minimal OpenAI-compatible chat completions server, rate limiting the first requests
+    def __init__(self, rate_limited: int = 2, delay: float = 0.1):
+        self.rate_limited = rate_limited
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def completion(self, request: dict) -> dict:
+        sentences = [{"en": "I need water.", "es": "Necesito agua."}]
+        return {
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "function_call",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "function_call": {"name": "fn_sentences", "arguments": json.dumps({"sentences": sentences})},
+                    },
+                }
+            ],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        }
+
+    def app(self) -> Litestar:
+        @post("/v1/chat/completions")
+        async def chat_completions(data: dict) -> Response:
+            self.requests += 1
+            if self.requests <= self.rate_limited:
+                return Response({"error": {"message": "Rate limit", "type": "rate_limit"}}, status_code=429)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(self.delay)
+            self.in_flight -= 1
+            return Response(self.completion(data), status_code=200)
+
+        return Litestar([chat_completions])
+
+
+@pytest_asyncio.fixture
+async def stub_openai():
+    stub = StubOpenAI()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(stub.app(), host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    stub.url = f"http://127.0.0.1:{port}/v1"
+    yield stub
+    server.should_exit = True
+    await task
+
+
+async def test_gpt_client_parallel_load(stub_openai, monkeypatch):
+    monkeypatch.setattr(settings, "GPT_TOKEN", "stub")
+    monkeypatch.setattr(settings, "GPT_MAX_CONCURRENCY", 4)
+    client = GPTClient(base_url=stub_openai.url, retry_delay=0.01)
+    source = GPTSentences(client=client)
+
+    N = 20
+    start = time.perf_counter()
+    results = await asyncio.gather(*(source.generate_senteces(["agua", "necesitar"], N=1) for _ in range(N)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+
+    assert all(result == [{"en": "I need water.", "es": "Necesito agua."}] for result in results)
+    # Calls run concurrently, up to the setting: 20 calls of 100ms through 4 slots take ~0.5s, 2s one by one
+    assert stub_openai.max_in_flight == 4
+    assert elapsed < N * stub_openai.delay / 2
+    assert client.stats.calls == N
+    assert client.stats.retries == 2
+    assert client.stats.errors == 0
+    assert client.stats.total_tokens == N * 15
@@ -0,0 +1,68 @@
+from uuid import uuid4
+
+from backend.babble import models
+from backend.babble.index import SENTENCE_INDEX, LemmaIndex, SentenceIndex
+from backend.babble.models import BabbleSentence
+
+
+def test_lemma_index():
+    index = LemmaIndex()
+    hola, gracias, agua, empty = uuid4(), uuid4(), uuid4(), uuid4()
+    index.add(hola, ["hola", "amigo"])
+    index.add(gracias, ["gracias", "por", "tu", "ayuda"])
+    index.add(agua, ["necesitar", "agua"])
+    index.add(empty, [])
+
+    assert set(index.find(["hola", "amigo", "necesitar"])) == {hola, empty}
+    assert index.find(["hola"], req_dictionary=["amigo"]) == [hola]
+    assert index.find(["hola", "amigo"], req_dictionary=["agua"]) == []
+    assert index.find(["necesitar"], req_dictionary=["agua"], exclude_ids=[agua]) == []
+
+    index.add(agua, ["agua"])
+    assert index.find([], req_dictionary=["agua"]) == [agua]
+
+    index.remove(hola)
+    assert index.find(["hola", "amigo"]) == [empty]
+    assert "hola" not in index.postings
+
+
+async def test_sentence_index_refresh():
+    index = SentenceIndex()
+    await index.load()
+    sentence = BabbleSentence(text={"es": "Hola amigo", "en": "Hello friend"}, lemmas={"es": ["hola", "amigo"]})
+    await sentence.insert()  # saved by this process: applied to SENTENCE_INDEX, the other index isn't told
+    assert index["es"].find(["hola", "amigo"]) == []
+
+    # Checked at most every interval seconds
+    await index.refresh(interval=60)
+    assert index["es"].find(["hola", "amigo"]) == []
+    await index.refresh()
+    assert index["es"].find(["hola", "amigo"]) == [sentence.id]
+    # Only the changed sentence was read
+    assert (index.reloads, index.updates) == (1, 1)
+
+    # Own changes don't make it update
+    updates = SENTENCE_INDEX.updates
+    await sentence.delete()
+    await SENTENCE_INDEX.refresh()
+    assert SENTENCE_INDEX.updates == updates
+    assert SENTENCE_INDEX["es"].find(["hola", "amigo"]) == []
+
+    await index.refresh()
+    assert index["es"].find(["hola", "amigo"]) == []
+    assert (index.reloads, index.updates) == (1, 2)
+
+
+async def test_sentence_index_refresh_reloads_when_behind(monkeypatch):
+    monkeypatch.setattr(models, "TRACK_SENTENCE_CHANGES", 1)
+    index = SentenceIndex()
+    await index.load()
+    hola = BabbleSentence(text={"es": "Hola amigo", "en": "Hello friend"}, lemmas={"es": ["hola", "amigo"]})
+    agua = BabbleSentence(text={"es": "Necesito agua", "en": "I need water"}, lemmas={"es": ["necesitar", "agua"]})
+    await hola.insert()
+    await agua.insert()
+
+    # Changes of the first insert aren't kept anymore
+    await index.refresh()
+    assert (index.reloads, index.updates) == (2, 0)
+    assert set(index["es"].find(["hola", "amigo", "necesitar", "agua"])) == {hola.id, agua.id}
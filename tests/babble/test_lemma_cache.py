@@ -0,0 +1,32 @@
+from backend.babble import lemmas
+from backend.babble.lemma_cache import LemmaCache
+
+
+def test_lemma_cache_lru(tmp_path):
+    cache = LemmaCache(maxsize=2, path=str(tmp_path / "lemmas.sqlite"))
+    cache.set("a", ["hola"])
+    cache.set("b", ["amigo"])
+    assert cache.get("a") == ["hola"]
+    cache.set("c", ["agua"])
+
+    assert list(cache.data) == ["a", "c"]
+    assert cache.get("x") is None
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 1}
+
+    # Evicted from memory, but still on disk - also for a fresh cache after restart
+    assert cache.get("b") == ["amigo"]
+    assert LemmaCache(maxsize=2, path=str(tmp_path / "lemmas.sqlite")).get("c") == ["agua"]
+
+
+def test_tables_version(monkeypatch):
+    version = lemmas.tables_version("es")
+    assert lemmas.tables_version("es") == version
+
+    monkeypatch.setitem(lemmas.FAKE_PROPNS, "es", [*lemmas.FAKE_PROPNS["es"], "Bah"])
+    assert lemmas.tables_version("es") == version  # not hashed again on every call
+    lemmas.tables_version.cache_clear()
+    assert lemmas.tables_version("es") != version
+
+    monkeypatch.undo()
+    lemmas.tables_version.cache_clear()
+    assert lemmas.tables_version("es") == version
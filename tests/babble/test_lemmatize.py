@@ -1,4 +1,4 @@
-from backend.babble.lemmas import lemmatize
+from backend.babble.lemmas import lemmatize, lemmatize_many
 
 
 def test_lemmatize():
@@ -8,3 +8,20 @@ def test_lemmatize():
     assert lemmatize("es", "¿Tú vas a ir bien?") == ["tú", "ir", "a", "ir", "bien"]
 
     assert lemmatize("en", "Yes, I am going.") == ["yes", "I", "be", "go"]
+
+
+def test_lemmatize_single_pass_matches_two_pass():
+    with open("to_check_tokenizator.txt", "r") as f:
+        sentences = [line.strip() for line in f if line.strip()]
+    sentences += ["¡Hola, amigo!", "Señorita Parker", "Hola Jacinto, ¿vamos?"]
+
+    for sentence in sentences:
+        assert lemmatize("es", sentence) == lemmatize("es", sentence, two_pass=True)
+
+
+def test_lemmatize_many():
+    sentences = ["¡Hola, amigo!", "Sí, puedo hacerlo.", "Señorita Parker", "¿Tú vas a ir bien?", "Eh, Jacinto"]
+    assert lemmatize_many("es", sentences, batch_size=2) == [lemmatize("es", sentence) for sentence in sentences]
+    assert lemmatize_many("es", sentences, skip_propns=True) == [
+        lemmatize("es", sentence, skip_propns=True) for sentence in sentences
+    ]
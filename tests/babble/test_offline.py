@@ -0,0 +1,35 @@
+from backend.babble.babble import generate_babble, get_sentences
+from backend.babble.offline import OfflineSentences
+from backend.settings import settings
+
+DICTIONARY = ["amigo", "bien", "casa", "hola", "no", "sí", "yo", "tener", "ir"]
+
+
+async def test_offline_sentences():
+    source = OfflineSentences()
+    sentences = await source.generate_senteces(DICTIONARY, ["agua"], N=10)
+    assert len(sentences) == 10
+    assert sentences == await source.generate_senteces(DICTIONARY, ["agua"], N=10)
+    for sentence in sentences:
+        assert sentence.keys() == settings.LANGUAGES.keys()
+        assert "agua" in sentence["es"].lower()
+        assert "water" in sentence["en"].lower()
+
+
+async def test_offline_sentences_without_known_words():
+    # First lesson: nothing known yet, every sentence has one of the new words only
+    source = OfflineSentences()
+    sentences = await source.generate_senteces([], ["agua", "casa"], N=4)
+    assert len(sentences) == 4
+    for sentence in sentences:
+        assert sentence["es"].strip("¡!¿?.").lower() in {"agua", "casa"}
+    assert await source.generate_senteces([], [], N=4) == []
+
+
+async def test_offline_source_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SENTENCE_SOURCE", "offline")
+    sentences = await generate_babble(DICTIONARY, ["agua"], N=5)
+    assert len(sentences) == 5
+    assert all("agua" in sentence.lemmas["es"] for sentence in sentences)
+
+    assert len(await get_sentences(DICTIONARY, ["agua"], N=3)) == 3
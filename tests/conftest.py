@@ -7,6 +7,7 @@ from testcontainers.mongodb import MongoDbContainer
 
 from backend.api_app import app
 from backend.app_ctx import AppCtx
+from backend.babble.index import SENTENCE_INDEX
 from backend.babble.models import BabbleSentence
 from backend.core.crypto import encode_jwt_token
 from backend.core.models import User
@@ -36,6 +37,7 @@ async def app_ctx(mongo_container, http_client):
 async def clean_db():
     await User.find_all().delete()
     await BabbleSentence.find_all().delete()
+    SENTENCE_INDEX.clear()
 
 
 @pytest_asyncio.fixture
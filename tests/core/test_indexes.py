@@ -0,0 +1,45 @@
+import pytest
+
+from backend.babble.models import BabbleSentence
+from backend.core.indexes import ensure_indexes, query_stages
+from backend.core.models import User
+from backend.courses.models import UserProgress
+from backend.courses.worker import create_polling_indexes, recent_exercises_query
+from backend.dictionary.models import DICTIONARIES
+
+HOT_QUERIES = [
+    (
+        BabbleSentence,
+        {"$and": [{"$expr": {"$setIsSubset": ["$lemmas.es", ["hola"]]}}, {"lemmas.es": {"$in": ["hola"]}}]},
+    ),
+    (BabbleSentence, {"text.es": {"$in": ["¡Hola, amigo!"]}}),
+    (BabbleSentence, {"content_hash": "abc"}),
+    (User, {"email": "test@test.me"}),
+    (DICTIONARIES["es"], {"$or": [{"_id": "si"}, {"normalized": "si"}]}),
+]
+
+
+@pytest.mark.parametrize("model, query", HOT_QUERIES)
+async def test_hot_queries_use_indexes(model, query):
+    assert "COLLSCAN" not in await query_stages(model, query)
+
+
+async def test_polling_query_uses_indexes():
+    await create_polling_indexes()
+    assert "COLLSCAN" not in await query_stages(UserProgress, recent_exercises_query(0))
+
+
+async def test_ensure_indexes():
+    collection = BabbleSentence.get_motor_collection()
+    await collection.create_index("lemmas.xx")
+    await collection.drop_index("text.es_1")
+
+    [report] = await ensure_indexes([BabbleSentence])
+    assert report.created == ["text.es_1"]
+    assert report.dropped == []
+    assert "lemmas.xx_1" in await collection.index_information()
+
+    [report] = await ensure_indexes([BabbleSentence], drop=True)
+    assert report.created == []
+    assert report.dropped == ["lemmas.xx_1"]
+    assert "lemmas.xx_1" not in await collection.index_information()
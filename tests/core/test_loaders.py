@@ -0,0 +1,34 @@
+import asyncio
+
+from backend.babble.models import BabbleSentence
+from backend.core.loaders import DataLoader, Loaders
+from backend.dictionary.models import DICTIONARIES
+
+
+async def test_data_loader_batches():
+    batches = []
+
+    async def batch_load(keys):
+        batches.append(keys)
+        return {key: key * 2 for key in keys if key != 3}
+
+    loader = DataLoader(batch_load)
+    results = await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load_many([3, 4, 2]))
+    assert results == [2, 4, 2, {4: 8, 2: 4}]
+    assert await loader.load_many([1, 5]) == {1: 2, 5: 10}
+    assert batches == [[1, 2, 3, 4], [5]]
+
+
+async def test_loaders():
+    await DICTIONARIES["es"](id="hola", translations={"en": ["hello"]}).save()
+    sentence = BabbleSentence(text={"es": "Hola.", "en": "Hello."}, lemmas={"es": ["hola"]})
+    await sentence.insert()
+
+    loaders = Loaders()
+    translations, lemmas = await asyncio.gather(
+        loaders.translations("es").load_many(["hola", "adios", "hola"]),
+        loaders.sentence_lemmas.load_many([sentence.id]),
+    )
+    assert translations == {"hola": {"en": ["hello"]}}
+    assert lemmas[sentence.id].lemmas == {"es": ["hola"]}
+    assert loaders.translations("es").batches == 1
@@ -0,0 +1,23 @@
+import json
+import os
+
+from backend.courses.courses import COURSES, get_course_words, get_new_words
+
+
+def test_course_registry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "es").mkdir()
+    path = tmp_path / "es" / "test.json"
+    path.write_text(json.dumps({"el": 10, "que": 5, "ver": 1}))
+
+    course = COURSES.get_course("es", "test")
+    assert course.words == ["el", "que", "ver"]
+    assert course.rank == {"el": 0, "que": 1, "ver": 2}
+    assert course.total_frequency == 16
+    assert COURSES.get_course("es", "test") is course
+    assert get_new_words("es", "test", ["el"], N=1) == ["que"]
+
+    path.write_text(json.dumps({"ver": 3}))
+    os.utime(path, ns=(course.version + 1_000_000, course.version + 1_000_000))
+    assert get_course_words("es", "test") == ["ver"]
+    assert COURSES.get_course("es", "test").total_frequency == 3
@@ -0,0 +1,32 @@
+from uuid import uuid4
+
+from backend.courses.models import LanguageData, WordData
+from backend.courses.scheduler import DAY, FIRST_INTERVAL, MIN_EASE, SECOND_INTERVAL, START_EASE, review
+
+
+def test_review():
+    assert review(0, START_EASE, 0, True, 100) == (FIRST_INTERVAL, START_EASE + 10, 100 + FIRST_INTERVAL)
+    # Seen again in the same lesson
+    assert review(FIRST_INTERVAL, 260, 100 + FIRST_INTERVAL, True, 200) == (FIRST_INTERVAL, 260, 100 + FIRST_INTERVAL)
+    assert review(FIRST_INTERVAL, 260, DAY, True, DAY) == (SECOND_INTERVAL, 270, DAY + SECOND_INTERVAL)
+    assert review(10 * DAY, 250, DAY, True, DAY) == (25 * DAY, 260, 26 * DAY)
+    assert review(10 * DAY, MIN_EASE + 5, DAY, False, 50) == (0, MIN_EASE, 50)
+
+
+def test_due_words():
+    l_data = LanguageData(
+        words={
+            "a": WordData(due_ts=300, last_seen_ts=10),
+            "b": WordData(due_ts=100, last_seen_ts=10),
+            "c": WordData(due_ts=200, last_seen_ts=5),
+            "d": WordData(due_ts=200, last_seen_ts=1),
+        }
+    )
+    assert l_data.get_due_words(3) == ["b", "d", "c"]
+    assert l_data.get_due_words(3) == ["b", "d", "c"]
+
+    l_data.add_exercise(id=uuid4(), words=["b"], correct=True, ts=1000)
+    l_data.add_exercise(id=uuid4(), words=["a"], correct=False, ts=1000)
+    l_data.add_new_words(["e"], ts=1000)
+    assert l_data.get_due_words(10) == ["e", "d", "c", "a", "b"]
+    assert l_data.words["b"].due_ts == 1000 + FIRST_INTERVAL
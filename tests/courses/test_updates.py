@@ -0,0 +1,107 @@
+import asyncio
+from uuid import uuid4
+
+from backend.babble.models import BabbleSentence
+from backend.courses.models import CourseStats, LanguageData, UserProgress, WordData
+from backend.courses.updates import (
+    exercise_results_update,
+    save_exercise_results,
+    save_language_fields,
+    version_filter,
+)
+
+
+async def test_update_matches_add_exercise(user, monkeypatch):
+    lang_data = LanguageData(
+        courses=["casa"],
+        words={
+            "el": WordData(seen_times=4, correctness_rate=80),
+            "ver": WordData(seen_times=10, correctness_last_times=[True, False, True]),
+        },
+        total_exercises=3,
+    )
+    lang_data._lang = "es"
+    lang_data.get_course_stats("casa")
+    lang_data.get_course_frontier("casa")
+    await UserProgress(id=user.id, languages={"es": lang_data}).save()
+
+    results = [
+        (uuid4(), ["el", "ver", "el", "nuevo"], False),
+        (uuid4(), ["el", "casa"], True),
+        (uuid4(), ["ver"], True),
+    ]
+    monkeypatch.setattr("time.time", lambda: 1234)
+    assert await save_exercise_results(user.id, "es", results)
+
+    for id, words, correct in results:
+        lang_data.add_exercise(id=id, words=words, correct=correct)
+
+    user_progress = await UserProgress.get(user.id)
+    assert user_progress.languages["es"] == lang_data
+
+
+async def test_stale_update_is_not_applied(user):
+    await UserProgress(id=user.id, languages={"es": LanguageData(words={"hola": WordData(seen_times=1)})}).save()
+    # Two submissions applied to the same loaded data: the second one would overwrite the first one
+    first, second = [(await UserProgress.get(user.id)).languages["es"] for _ in range(2)]
+    collection = UserProgress.get_motor_collection()
+    update = exercise_results_update("es", first, [(uuid4(), ["hola"], True)])
+    assert (await collection.update_one(version_filter(user.id, "es", 0), update)).matched_count == 1
+    update = exercise_results_update("es", second, [(uuid4(), ["hola"], True)])
+    assert (await collection.update_one(version_filter(user.id, "es", 0), update)).matched_count == 0
+
+    assert (await UserProgress.get(user.id)).languages["es"].words["hola"].seen_times == 2
+
+
+async def test_missing_language_is_not_saved(user):
+    await UserProgress(id=user.id).save()
+    assert not await save_exercise_results(user.id, "es", [(uuid4(), ["hola"], True)])
+
+
+async def test_save_advanced_frontier(user):
+    await UserProgress(id=user.id, languages={"es": LanguageData(courses=["casa"])}).save()
+    lang_data = (await UserProgress.get(user.id)).languages["es"]
+    new_words = lang_data.get_new_course_words("casa", 2)
+    lang_data.add_new_words(new_words)
+    assert lang_data.course_frontiers["casa"].index == 2
+    assert await save_language_fields(user.id, "es", lang_data, ["course_frontiers"])
+    assert (await UserProgress.get(user.id)).languages["es"].course_frontiers == lang_data.course_frontiers
+
+    # Not written over exercise results saved in between
+    assert await save_exercise_results(user.id, "es", [(uuid4(), ["hola"], True)])
+    assert not await save_language_fields(user.id, "es", lang_data, ["course_frontiers"])
+
+
+async def test_save_dotted_course_name(user):
+    await UserProgress(id=user.id, languages={"es": LanguageData()}).save()
+    lang_data = (await UserProgress.get(user.id)).languages["es"]
+    lang_data.course_stats["casa.s01e01"] = CourseStats(version=1, encountered=2)
+    assert await save_language_fields(user.id, "es", lang_data, ["course_stats"])
+    assert (await UserProgress.get(user.id)).languages["es"].course_stats == lang_data.course_stats
+
+
+async def test_concurrent_results(http_client, user, auth_headers):
+    await UserProgress(
+        id=user.id, languages={"es": LanguageData(courses=["casa"], words={"hola": WordData(seen_times=1)})}
+    ).save()
+    sentences = [
+        BabbleSentence(text={"es": f"Hola {i}", "en": f"Hello {i}"}, lemmas={"es": ["hola"]}) for i in range(10)
+    ]
+    await BabbleSentence.insert_many(sentences)
+
+    responses = await asyncio.gather(
+        *(
+            http_client.post(
+                "/exercise/result",
+                json={"user_id": str(user.id), "lang": "es", "results": {str(sentence.id): True}},
+                headers=auth_headers,
+            )
+            for sentence in sentences
+        )
+    )
+    assert all(response.status_code == 201 for response in responses)
+
+    lang_data = (await UserProgress.get(user.id)).languages["es"]
+    assert lang_data.total_exercises == 10
+    assert lang_data.words["hola"].seen_times == 11
+    assert set(lang_data.last_exercises) == {sentence.id for sentence in sentences}
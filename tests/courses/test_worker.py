@@ -0,0 +1,60 @@
+from unittest.mock import AsyncMock
+
+from backend.babble.index import SENTENCE_INDEX, SentenceIndex
+from backend.courses.models import LanguageData, UserProgress, WordData
+from backend.courses.worker import SENTENCE_WORKER
+from backend.settings import settings
+
+
+async def test_sentence_worker(user, mocker):
+    get_sentences_for_words = mocker.patch("backend.courses.worker.get_sentences_for_words", AsyncMock(return_value={}))
+    await UserProgress(
+        id=user.id,
+        languages={
+            "es": LanguageData(
+                courses=["casa"],
+                words={word: WordData(seen_times=1) for word in ["hola", "amigo", "agua", "casa"]},
+            )
+        },
+    ).save()
+
+    SENTENCE_WORKER.start()
+    try:
+        SENTENCE_WORKER.enqueue(user.id, "es")
+        SENTENCE_WORKER.enqueue(user.id, "es")  # merged with the queued job
+        assert SENTENCE_WORKER.stats().queue_depth == 1
+        await SENTENCE_WORKER.queue.join()
+    finally:
+        await SENTENCE_WORKER.stop()
+
+    stats = SENTENCE_WORKER.stats()
+    assert (stats.processed, stats.failed, stats.queue_depth) == (1, 0, 0)
+
+    suggested_call, new_words_call = get_sentences_for_words.call_args_list
+    assert set(suggested_call.kwargs["words"]) == {"hola", "amigo", "agua", "casa"}
+    assert suggested_call.kwargs["distinct"]
+    assert len(new_words_call.kwargs["words"]) == 4
+    assert not set(new_words_call.kwargs["words"]) & {"hola", "amigo", "agua", "casa"}
+
+
+async def test_standalone_worker_sentences_reach_api_index(user, monkeypatch):
+    # cli.py sentence_worker runs in its own process: the API's sentence index only learns about the sentences
+    # it stores through SentencesVersion
+    monkeypatch.setattr(settings, "SENTENCE_SOURCE", "offline")
+    await UserProgress(
+        id=user.id,
+        languages={
+            "es": LanguageData(
+                courses=["casa"],
+                words={word: WordData(seen_times=1) for word in ["hola", "amigo", "agua", "casa"]},
+            )
+        },
+    ).save()
+    api_index = SentenceIndex()
+    await api_index.load()
+
+    await SENTENCE_WORKER.prefill(user.id, "es")
+    assert len(SENTENCE_INDEX["es"]) > len(api_index["es"])
+
+    await api_index.refresh()
+    assert api_index["es"].lemmas == SENTENCE_INDEX["es"].lemmas
@@ -0,0 +1,79 @@
+import time
+
+from backend.dictionary.harvest import HarvestCheckpoint, TokenBucket, TranslationHarvester, get_translations_offline
+from backend.dictionary.models import DICTIONARIES
+from backend.dictionary.words import TranslationThrottled
+
+
+async def test_token_bucket():
+    bucket = TokenBucket(rate=100, capacity=5)
+    start = time.monotonic()
+    for _ in range(10):
+        await bucket.acquire()
+    assert 0.04 <= time.monotonic() - start < 0.5
+
+    start = time.monotonic()
+    bucket.pause(0.1)
+    await bucket.acquire()
+    assert 0.1 <= time.monotonic() - start < 0.5
+
+
+async def test_harvest_translations(tmp_path):
+    calls = []
+
+    def translator(word, source, target):
+        calls.append(word)
+        if word == "agua" and calls.count(word) == 1:
+            raise ConnectionError("flaky")
+        if word == "nada":
+            raise ValueError("not found")
+        return get_translations_offline(word, source, target)
+
+    await DICTIONARIES["es"](id="casa", translations={"en": ["home"]}).save()
+    checkpoint = tmp_path / "checkpoint.json"
+    harvester = TranslationHarvester(
+        "es",
+        translator=translator,
+        rate=1000,
+        burst=10,
+        batch_size=2,
+        retries=1,
+        retry_delay=0,
+        checkpoint_path=checkpoint,
+    )
+    stats = await harvester.run(["hola", "agua", "casa", "amigo", "nada", "hola"])
+
+    assert (stats.total, stats.skipped, stats.fetched, stats.failed) == (5, 1, 3, 1)
+    assert sorted(calls) == ["agua", "agua", "amigo", "hola", "nada", "nada"]
+    assert (await DICTIONARIES["es"].get("agua")).translations == {"en": ["water"]}
+    assert (await DICTIONARIES["es"].get("casa")).translations == {"en": ["home"]}
+    saved = HarvestCheckpoint.load(checkpoint)
+    assert saved.done == {"hola", "agua", "amigo"}
+    assert list(saved.failed) == ["nada"]
+
+    # Resumed: only the failed word is fetched again
+    calls.clear()
+    harvester = TranslationHarvester("es", translator=translator, rate=1000, retries=0, checkpoint_path=checkpoint)
+    stats = await harvester.run(["hola", "agua", "casa", "amigo", "nada"])
+    assert calls == ["nada"]
+    assert (stats.skipped, stats.failed) == (4, 1)
+
+
+async def test_harvest_throttled():
+    calls = []
+    throttled_at = []
+
+    def translator(word, source, target):
+        calls.append(time.monotonic())
+        if not throttled_at:
+            throttled_at.append(time.monotonic())
+            raise TranslationThrottled("429 Too Many Requests")
+        return get_translations_offline(word, source, target)
+
+    harvester = TranslationHarvester("es", translator=translator, rate=20, concurrency=2, retry_delay=0.2)
+    stats = await harvester.run(["hola", "agua", "amigo", "casa"])
+
+    assert (stats.fetched, stats.failed) == (4, 0)
+    # All workers pause after a throttled call, not only the one that got it
+    assert len(calls) == 5
+    assert all(ts - throttled_at[0] >= 0.2 for ts in calls[1:])
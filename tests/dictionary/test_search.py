@@ -0,0 +1,44 @@
+from backend.dictionary.search import SearchIndex
+
+
+def test_search_index():
+    index = SearchIndex(
+        {
+            "café": {"en": ["coffee"]},
+            "cama": {"en": ["bed"]},
+            "camión": {"en": ["truck", "lorry"]},
+            "camino": {"en": ["way", "path"]},
+            "tener": {"en": ["to have"]},
+            "haber": {"en": ["to have", "there is"]},
+        }
+    )
+    assert index.search("CAF").ids == ["café"]
+    assert index.search("camio").ids == ["camión"]
+    assert index.search("ha").ids == ["haber", "tener"]
+    assert index.search("to").ids == ["haber", "tener"]
+    assert index.search("xyz").ids == []
+
+    page = index.search("cam", limit=2)
+    assert page.ids == ["cama", "camino"]
+    page = index.search("cam", limit=2, cursor=page.cursor)
+    assert (page.ids, page.cursor) == (["camión"], None)
+    # The last page is full: entries left ("to have") are of words on it
+    page = index.search("to", limit=2)
+    assert (page.ids, page.cursor) == (["haber", "tener"], None)
+
+    page = index.search("", limit=4)
+    assert page.ids == ["café", "cama", "camino", "camión"]
+    assert index.search("", limit=4, cursor=page.cursor).ids == ["haber", "tener"]
+
+
+def test_search_index_put():
+    translations = {"café": {"en": ["coffee"]}, "cama": {"en": ["bed"]}, "tener": {"en": ["to have"]}}
+    index = SearchIndex(translations)
+    index.put("cama", {"en": ["bunk"]})
+    index.put("haber", {"en": ["to have"]})
+    translations |= {"cama": {"en": ["bunk"]}, "haber": {"en": ["to have"]}}
+
+    rebuilt = SearchIndex(translations)
+    assert (index.keys, index.entries, index.ids) == (rebuilt.keys, rebuilt.entries, rebuilt.ids)
+    assert index.search("bed").ids == []
+    assert index.search("bu").ids == ["cama"]
@@ -0,0 +1,47 @@
+from backend.dictionary.models import DICTIONARIES, DictionaryVersion
+from backend.dictionary.snapshot import DICTIONARY_SNAPSHOTS, DictionarySnapshot
+
+
+async def test_dictionary_snapshot():
+    await DICTIONARY_SNAPSHOTS.load()
+    version = DICTIONARY_SNAPSHOTS["es"].version
+
+    word = DICTIONARIES["es"](id="café", translations={"en": ["coffee"]})
+    await word.save()
+    snapshot = DICTIONARY_SNAPSHOTS["es"]
+    assert snapshot.get_translations(["café", "té"]) == {"café": {"en": ["coffee"]}}
+    assert snapshot.find("cafe") == ["café"]
+    assert snapshot.version == version + 1
+    assert await DICTIONARY_SNAPSHOTS.refresh() == []
+
+    # Changed by another process
+    await (
+        DICTIONARIES["es"]
+        .get_motor_collection()
+        .update_one({"_id": "café"}, {"$set": {"translations.en": ["coffee", "cafe"]}})
+    )
+    await DictionaryVersion.bump("es")
+    assert await DICTIONARY_SNAPSHOTS.refresh() == ["es"]
+    assert DICTIONARY_SNAPSHOTS["es"].get_translations(["café"]) == {"café": {"en": ["coffee", "cafe"]}}
+
+
+def test_snapshot_changes():
+    snapshot = DictionarySnapshot()
+    snapshot.loaded = True
+    snapshot.put("café", "cafe", {"en": ["coffee"]})
+    assert snapshot.changed == []  # nobody takes changes yet
+
+    assert snapshot.take_changes("search") == []
+    assert snapshot.take_changes("other") == []
+    snapshot.put("té", "te", {"en": ["tea"]})
+    snapshot.put("café", "cafe", {"en": ["coffee", "cafe"]})
+    snapshot.put("té", "te", {"en": ["tea"]})
+    assert snapshot.take_changes("search") == ["té", "café"]
+    assert snapshot.take_changes("search") == []
+    assert len(snapshot.changed) == 3  # not taken by "other" yet
+
+    snapshot.put("agua", "agua", {"en": ["water"]})
+    assert snapshot.take_changes("other") == ["té", "café", "agua"]
+    assert snapshot.changed == ["agua"]
+    assert snapshot.take_changes("search") == ["agua"]
+    assert snapshot.changed == []
@@ -1,4 +1,9 @@
-from backend.courses.models import LanguageData, WordData
+import random
+from uuid import uuid4
+
+from backend.courses.courses import COURSES
+from backend.courses.models import PRACTICE_STRATEGIES, CourseFrontier, CourseStats, LanguageData, WordData
+from backend.settings import settings
 
 
 def test_suggested_words():
@@ -38,3 +43,118 @@ def test_suggested_words():
     )
 
     assert l_data.suggest_words_to_practice(4) == {"a", "b", "e", "f"}
+
+
+def test_suggest_least_seen_matches_sort():
+    rng = random.Random(1)
+    words = {
+        str(i): WordData(seen_times=rng.randint(1, 5), last_seen_ts=rng.randint(1, 20), first_seen_ts=rng.randint(1, 5))
+        for i in range(200)
+    }
+    l_data = LanguageData(words=words)
+
+    long_no_seen = sorted(words, key=lambda w: words[w].last_seen_ts)[:3]
+    least_seen = sorted(
+        [word for word in words if word not in long_no_seen],
+        key=lambda w: (words[w].seen_times, words[w].first_seen_ts),
+    )[:4]
+    assert l_data.suggest_words_to_practice(7) == set(long_no_seen + least_seen)
+
+
+def test_practice_strategy_setting(monkeypatch):
+    l_data = LanguageData(words={"a": WordData(seen_times=1), "b": WordData(seen_times=2)})
+    monkeypatch.setitem(PRACTICE_STRATEGIES, "most_seen", lambda lang_data, N: {max(lang_data.words)})
+    monkeypatch.setattr(settings, "PRACTICE_STRATEGY", "most_seen")
+    assert l_data.suggest_words_to_practice() == {"b"}
+
+
+def test_course_stats():
+    l_data = LanguageData(
+        courses=["casa"],
+        words={
+            "saber": WordData(seen_times=1, correctness_rate=100),
+            "ver": WordData(seen_times=10, correctness_rate=90),
+        },
+    )
+    l_data._lang = "es"
+    stats, rebuilt = l_data.get_course_stats("casa")
+    assert rebuilt
+    assert (stats.encountered, stats.new, stats.bad) == (2, 1, 0)
+
+    for _ in range(4):
+        l_data.add_exercise(id=uuid4(), words=["saber", "pensar"], correct=False)
+
+    stats, rebuilt = l_data.get_course_stats("casa")
+    assert not rebuilt
+    assert stats.model_dump() == l_data.rebuild_course_stats("casa").model_dump()
+    assert (stats.encountered, stats.new, stats.bad) == (3, 1, 2)
+
+
+def test_course_stats_missing_course():
+    l_data = LanguageData(courses=["casa"], words={"saber": WordData(seen_times=1)})
+    l_data._lang = "es"
+    l_data.get_course_stats("casa")
+    l_data.course_stats["removed"] = CourseStats(version=1, encountered=1)
+
+    l_data.add_exercise(id=uuid4(), words=["saber", "pensar"])
+    assert list(l_data.course_stats) == ["casa"]
+    assert l_data.course_stats["casa"].encountered == 2
+
+
+def test_course_frontier():
+    course_words = COURSES.get_course("es", "casa").words
+    l_data = LanguageData(courses=["casa"], words={word: WordData() for word in course_words[:3] + course_words[5:7]})
+    l_data._lang = "es"
+
+    assert l_data.get_new_course_words("casa", 3) == [course_words[3], course_words[4], course_words[7]]
+    frontier, rebuilt = l_data.get_course_frontier("casa")
+    assert not rebuilt
+    assert (frontier.index, frontier.skipped) == (3, set(course_words[5:7]))
+
+    l_data.add_exercise(id=uuid4(), words=[course_words[3], course_words[9]])
+    assert (frontier.index, frontier.skipped) == (4, set(course_words[5:7] + course_words[9:10]))
+    assert l_data.get_new_course_words("casa", 2) == [course_words[4], course_words[7]]
+    assert (frontier.index, frontier.skipped) == (4, set(course_words[5:7] + course_words[9:10]))
+
+    l_data.add_new_words([course_words[4]])
+    assert (frontier.index, frontier.skipped) == (7, {course_words[9]})
+    assert l_data.get_new_course_words("casa", 2) == [course_words[7], course_words[8]]
+    assert (frontier.index, frontier.skipped) == (7, {course_words[9]})
+
+    # Stale entries below the index are dropped
+    frontier.skipped.add(course_words[0])
+    frontier.advance(COURSES.get_course("es", "casa"), l_data.words)
+    assert frontier.skipped == {course_words[9]}
+
+
+def test_course_frontier_missing_course():
+    course_words = COURSES.get_course("es", "casa").words
+    l_data = LanguageData(courses=["casa"], words={word: WordData() for word in course_words[:3]})
+    l_data._lang = "es"
+    l_data.get_course_frontier("casa")
+    l_data.course_frontiers["removed"] = CourseFrontier(version=1)
+
+    l_data.add_exercise(id=uuid4(), words=[course_words[3]])
+    assert list(l_data.course_frontiers) == ["casa"]
+    assert l_data.get_new_course_words("casa", 1) == [course_words[4]]
+
+
+def test_word_data_correctness():
+    data = WordData.model_validate(
+        {"seen_times": 12, "last_seen_ts": 10, "correctness_last_times": [False] + [True] * 10, "correctness_rate": 100}
+    )
+    assert data.seen_times == 12
+    assert data.correctness_last_times == [True] * 10
+
+    data.add_seen(False)
+    data.add_seen(True)
+    assert data.correctness_last_times == [True] * 8 + [False, True]
+    assert data.correctness_rate == 90
+    assert data.seen_times == 14
+
+    stored = data.model_dump(by_alias=True)
+    assert stored.keys() == {"n", "l", "f", "c", "k", "r", "d", "i", "e"}
+    assert WordData.model_validate(stored) == data
+
+    data.correctness_last_times = [False, True]
+    assert (data.correctness_bits, data.correctness_count) == (0b01, 2)